@@ -0,0 +1,112 @@
+"""Event loop latency benchmark for the asyncio API.
+
+Renders the same set of codes three ways, uncached, inside one event loop
+while a heartbeat task asks to wake up every --tick ms and records how late
+each wake-up is:
+
+    blocking    render_bytes() called directly from coroutines (what to avoid)
+    threads     qrasync.AsyncRenderer on a thread pool
+    processes   qrasync.AsyncRenderer on a process pool
+
+and reports codes per second with the median, 99th percentile and worst
+heartbeat lag. Every rendered file is compared with the blocking result.
+
+Usage:
+    python benchmarks/bench_async.py [--codes 300] [--workers N] [--tick 5] [--max-version 15]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from common import payload_for_version
+
+import numpy as np
+
+from qrasync import AsyncRenderer
+from qrengine import ERROR_CORRECTION_MAP, QROptions, matrix_cache
+from qrexport import render_bytes
+
+
+async def heartbeat(tick, lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - start - tick)
+
+
+async def blocking(options_list):
+    async def one(options):
+        return render_bytes(options)
+    return await asyncio.gather(*(one(options) for options in options_list))
+
+
+async def pooled(options_list, workers, processes):
+    async with AsyncRenderer(workers=workers, processes=processes) as renderer:
+        # Start the workers outside the measurement
+        await asyncio.gather(*(renderer.render("warm up") for _ in range(renderer.workers)))
+        results = [None] * len(options_list)
+        async for index, body, error in renderer.render_many(options_list, ordered=False):
+            if error is not None:
+                raise RuntimeError(error)
+            results[index] = body
+        return results
+
+
+async def measure(name, work, tick):
+    # Threads share the matrix cache, so every mode starts cold
+    matrix_cache.clear()
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(tick, lags, stop))
+    await asyncio.sleep(tick * 2)
+    start = time.perf_counter()
+    results = await work
+    seconds = time.perf_counter() - start
+    stop.set()
+    await beat
+    return name, results, seconds, np.array(lags or [0.0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--tick", type=float, default=5, help="heartbeat interval in ms")
+    parser.add_argument("--max-version", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    options_list = []
+    for _ in range(args.codes):
+        level = rng.choice("LMQH")
+        payload = payload_for_version(rng.randint(1, args.max_version), ERROR_CORRECTION_MAP[level], rng)
+        options_list.append(QROptions(data=payload, error_level=level, box_size=rng.randint(1, 5) * 10))
+    tick = args.tick / 1000
+
+    async def run():
+        runs = [await measure("blocking", blocking(options_list), tick)]
+        runs.append(await measure("threads", pooled(options_list, args.workers, False), tick))
+        runs.append(await measure("processes", pooled(options_list, args.workers, True), tick))
+        return runs
+
+    runs = asyncio.run(run())
+    reference = runs[0][1]
+    mismatches = 0
+
+    print(f"{'mode':>10} {'codes/sec':>10} {'lag p50 ms':>10} {'lag p99 ms':>10} {'lag max ms':>10} match")
+    for name, results, seconds, lags in runs:
+        match = results == reference
+        mismatches += not match
+        p50, p99 = np.percentile(lags, [50, 99]) * 1000
+        print(f"{name:>10} {len(results) / seconds:>10.1f} {p50:>10.2f} {p99:>10.2f} {lags.max() * 1000:>10.2f} "
+              f"{'yes' if match else 'NO'}")
+    if mismatches:
+        print(f"{mismatches} mode(s) rendered different files")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
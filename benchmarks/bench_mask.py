@@ -0,0 +1,77 @@
+"""Mask selection benchmark: qrcode's eight trial layouts vs qrmask.
+
+For every QR version 1-40 it times the library's best_mask_pattern(), the
+vectorized qrmask.best_mask_pattern() and a pinned mask (no selection at
+all), and checks that the finished symbols match qrcode's bit for bit.
+
+Usage:
+    python benchmarks/bench_mask.py [--level M] [--repeat 3]
+"""
+import argparse
+import random
+import sys
+
+from common import best_of, payload_for_version
+
+import qrcode
+
+from qrengine import ERROR_CORRECTION_MAP, QROptions, build_qr
+from qrmask import best_mask_pattern
+
+
+def fresh_qr(payload, error_correction, mask_pattern=None):
+    qr = qrcode.QRCode(version=1, error_correction=error_correction, mask_pattern=mask_pattern)
+    qr.add_data(payload)
+    qr.best_fit(start=1)
+    return qr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--level", default="M", choices=sorted(ERROR_CORRECTION_MAP))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    error_correction = ERROR_CORRECTION_MAP[args.level]
+    rng = random.Random(0)
+    mismatches = 0
+    totals = [0.0, 0.0, 0.0]
+
+    print(f"{'version':>7} {'qrcode ms':>10} {'numpy ms':>9} {'pinned ms':>9} {'speedup':>8} match")
+    for version in range(1, 41):
+        payload = payload_for_version(version, error_correction, rng)
+
+        library_time, library_mask = best_of(
+            args.repeat, lambda: fresh_qr(payload, error_correction).best_mask_pattern()
+        )
+        numpy_time, numpy_mask = best_of(
+            args.repeat, lambda: best_mask_pattern(fresh_qr(payload, error_correction))
+        )
+        # Pinned: the layout qrcode does anyway for the final symbol, and nothing else
+        pinned_time, _ = best_of(
+            args.repeat, lambda: fresh_qr(payload, error_correction, numpy_mask).makeImpl(True, numpy_mask)
+        )
+
+        reference = fresh_qr(payload, error_correction)
+        reference.make(fit=True)
+        engine = build_qr(QROptions(data=payload, error_level=args.level))
+        match = library_mask == numpy_mask and reference.modules == engine.modules
+        mismatches += not match
+
+        totals[0] += library_time
+        totals[1] += numpy_time
+        totals[2] += pinned_time
+        print(f"{version:>7} {library_time * 1000:>10.2f} {numpy_time * 1000:>9.2f} {pinned_time * 1000:>9.2f} "
+              f"{library_time / numpy_time:>7.1f}x {'yes' if match else 'NO'}")
+
+    print(f"{'total':>7} {totals[0] * 1000:>10.2f} {totals[1] * 1000:>9.2f} {totals[2] * 1000:>9.2f} "
+          f"{totals[0] / totals[1]:>7.1f}x")
+    if mismatches:
+        print(f"{mismatches} version(s) differ from qrcode's output")
+        return 1
+    print("All symbols match qrcode bit for bit")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
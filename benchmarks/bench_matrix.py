@@ -0,0 +1,70 @@
+"""Module matrix representation benchmark: lists of bools vs NumPy vs QRMatrix.
+
+For a range of versions it reports the memory each representation of the
+same code takes and how many bytes cross a process boundary when it is
+pickled, and times a pickle round trip and unpacking a QRMatrix back to
+an array. Every round trip is checked against the original modules.
+
+Usage:
+    python benchmarks/bench_matrix.py [--versions 1 10 25 40] [--repeat 5]
+"""
+import argparse
+import pickle
+import random
+import sys
+
+from common import best_of, payload_for_version
+
+import numpy as np
+
+from qrengine import ERROR_CORRECTION_MAP, QROptions, build_qr
+from qrmatrix import QRMatrix
+
+
+def list_bytes(modules):
+    # The bools themselves are shared singletons, so only the lists count
+    return sys.getsizeof(modules) + sum(sys.getsizeof(row) for row in modules)
+
+
+def round_trip(value):
+    return pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, nargs="+", default=[1, 10, 25, 40])
+    parser.add_argument("--level", default="M", choices=sorted(ERROR_CORRECTION_MAP))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    mismatches = 0
+
+    print(f"{'version':>7} {'lists KB':>8} {'numpy KB':>8} {'packed KB':>9} "
+          f"{'lists pickle':>12} {'numpy pickle':>12} {'packed pickle':>13} "
+          f"{'lists ms':>8} {'numpy ms':>8} {'packed ms':>9} {'unpack ms':>9} match")
+    for version in args.versions:
+        payload = payload_for_version(version, ERROR_CORRECTION_MAP[args.level], rng)
+        modules = build_qr(QROptions(data=payload, error_level=args.level)).modules
+        array = np.array(modules, dtype=bool)
+        matrix = QRMatrix.from_array(array)
+
+        sizes = [list_bytes(modules), array.nbytes, sys.getsizeof(matrix) + sys.getsizeof(matrix.data.obj)]
+        pickled = [len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) for value in (modules, array, matrix)]
+        times = [best_of(args.repeat, lambda: round_trip(value))[0] for value in (modules, array, matrix)]
+        unpack_time, unpacked = best_of(args.repeat, matrix.array)
+
+        match = np.array_equal(unpacked, array) and round_trip(matrix) == matrix
+        mismatches += not match
+        print(f"{version:>7} {sizes[0] / 1024:>8.1f} {sizes[1] / 1024:>8.1f} {sizes[2] / 1024:>9.1f} "
+              f"{pickled[0]:>12} {pickled[1]:>12} {pickled[2]:>13} "
+              f"{times[0] * 1000:>8.3f} {times[1] * 1000:>8.3f} {times[2] * 1000:>9.3f} "
+              f"{unpack_time * 1000:>9.3f} {'yes' if match else 'NO'}")
+    if mismatches:
+        print(f"{mismatches} round trip(s) changed the modules")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
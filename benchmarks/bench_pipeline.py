@@ -0,0 +1,234 @@
+"""Per-stage benchmark of the generate/save pipeline.
+
+Times each stage separately across payload lengths (QR versions), error
+correction levels and slider sizes, and records wall time, peak RSS and
+allocated bytes per stage as JSON:
+
+    encode          add_data + make (mask selection included), uncached
+    rasterize       full export image at box_size = size * 10
+    display_resize  preview drawn for a 300 px display area
+    save_png        streamed PNG export to disk
+
+--legacy adds the pre-engine stages for comparison: qrcode's make_image,
+the LANCZOS resize of that image to 300 px, and PIL's PNG save.
+
+Usage:
+    python benchmarks/bench_pipeline.py run -o results.json [--versions 1,10,20,30,40] [--sizes 1-10]
+    python benchmarks/bench_pipeline.py compare old.json new.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import best_of, payload_for_version
+
+import numpy as np
+import qrcode
+from PIL import Image
+
+from qrengine import ERROR_CORRECTION_MAP, QROptions, build_qr, rasterize, rasterize_preview
+from qrexport import export_matrix
+
+DISPLAY_SIZE = 300
+
+# Full-size images above this many pixels are skipped (18,500 px squared is over 1 GB as RGB)
+DEFAULT_MAX_PIXELS = 25_000_000
+
+
+def _reset_peak_rss():
+    # Linux lets a process reset its own high-water mark, so peaks are per stage
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss():
+    """Peak resident set size in bytes, or None where it can't be read"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(func, repeat):
+    """Wall time (best of repeat), peak RSS and bytes allocated by one call of func"""
+    wall_time, _ = best_of(repeat, func)
+
+    # Memory is measured in a separate run so tracing doesn't skew the timing
+    per_stage_rss = _reset_peak_rss()
+    tracemalloc.start()
+    func()
+    _, allocated = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_time": wall_time,
+        "peak_rss": _peak_rss(),
+        "peak_rss_per_stage": per_stage_rss,
+        "allocated_bytes": allocated,
+    }
+
+
+def parse_range(text):
+    """Parse "1-10" or "1,5,10" into a list of ints"""
+    values = []
+    for part in text.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            values.extend(range(int(low), int(high) + 1))
+        else:
+            values.append(int(part))
+    return values
+
+
+def run(args):
+    rng = random.Random(0)
+    results = []
+    tmp = tempfile.mkdtemp(prefix="qrbench_")
+    png_path = os.path.join(tmp, "bench.png")
+
+    def record(stage, version, level, size, func):
+        entry = {"stage": stage, "version": version, "level": level, "size": size}
+        entry.update(measure(func, args.repeat))
+        results.append(entry)
+        print(f"{stage:>18} v{version:<2} {level} size {size if size else '-':>2} "
+              f"{entry['wall_time'] * 1000:>10.2f} ms {entry['allocated_bytes'] / 1e6:>9.2f} MB",
+              file=sys.stderr)
+
+    for version in args.versions:
+        for level in args.levels:
+            error_correction = ERROR_CORRECTION_MAP[level]
+            payload = payload_for_version(version, error_correction, rng)
+            options = QROptions(data=payload, error_level=level)
+            # Encoding doesn't depend on the slider size
+            record("encode", version, level, None, lambda: build_qr(options))
+            qr = build_qr(options)
+            matrix = np.array(qr.modules, dtype=bool)
+            modules = qr.modules_count + 2 * options.border
+
+            for size in args.sizes:
+                box_size = size * 10
+                sized = QROptions(data=payload, error_level=level, box_size=box_size)
+                too_big = (modules * box_size) ** 2 > args.max_pixels
+                if not too_big:
+                    record("rasterize", version, level, size, lambda: rasterize(matrix, box_size))
+                record("display_resize", version, level, size, lambda: rasterize_preview(matrix, DISPLAY_SIZE))
+                record("save_png", version, level, size, lambda: export_matrix(matrix, png_path, sized))
+
+                if args.legacy and not too_big:
+                    qr.box_size = box_size
+                    record("legacy_make_image", version, level, size, lambda: qr.make_image())
+                    image = qr.make_image().get_image()
+                    record("legacy_lanczos", version, level, size,
+                           lambda: image.resize((DISPLAY_SIZE, DISPLAY_SIZE), Image.LANCZOS))
+                    record("legacy_save_png", version, level, size, lambda: image.save(png_path))
+                    del image
+
+    shutil.rmtree(tmp)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qrcode": getattr(qrcode, "__version__", None) or _package_version("qrcode"),
+            "numpy": np.__version__,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"{len(results)} measurements written to {args.output}")
+    return 0
+
+
+def _package_version(name):
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+
+def _key(entry):
+    return (entry["stage"], entry["version"], entry["level"], entry["size"])
+
+
+def compare(args):
+    with open(args.old) as f:
+        old = {_key(entry): entry for entry in json.load(f)["results"]}
+    with open(args.new) as f:
+        new = {_key(entry): entry for entry in json.load(f)["results"]}
+
+    regressions = 0
+    for key in sorted(set(old) & set(new), key=lambda k: tuple(str(part) for part in k)):
+        for metric in ("wall_time", "allocated_bytes"):
+            before, after = old[key][metric], new[key][metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            # Tiny timings are mostly noise, so they need an absolute margin too
+            noise = metric == "wall_time" and after - before < args.min_time
+            if change > args.threshold and not noise:
+                regressions += 1
+                stage, version, level, size = key
+                print(f"REGRESSION {stage} v{version} {level} size {size}: "
+                      f"{metric} {before:.6g} -> {after:.6g} (+{change:.0%})")
+
+    only_old = len(set(old) - set(new))
+    if only_old:
+        print(f"{only_old} measurement(s) missing from {args.new}")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    run_parser = commands.add_parser("run", help="run the benchmark and write JSON results")
+    run_parser.add_argument("-o", "--output", default="bench_results.json")
+    run_parser.add_argument("--versions", type=parse_range, default=parse_range("1,5,10,20,30,40"),
+                            help="QR versions to sweep, e.g. 1-40 (default: 1,5,10,20,30,40)")
+    run_parser.add_argument("--levels", default="LMQH", help="error correction levels (default: LMQH)")
+    run_parser.add_argument("--sizes", type=parse_range, default=parse_range("1-10"),
+                            help="slider sizes to sweep (default: 1-10)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timing runs per stage, best is kept")
+    run_parser.add_argument("--max-pixels", type=int, default=DEFAULT_MAX_PIXELS,
+                            help="skip full-size images larger than this")
+    run_parser.add_argument("--legacy", action="store_true", help="also time the pre-engine pipeline")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown to flag")
+    compare_parser.add_argument("--min-time", type=float, default=0.0005,
+                                help="ignore slowdowns smaller than this many seconds")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
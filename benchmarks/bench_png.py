@@ -0,0 +1,101 @@
+"""PNG output benchmark: RGB images vs two colour palette images vs streaming.
+
+For a range of versions and box sizes it times building the image and
+writing it as a PNG three ways, and reports the file sizes:
+
+    rgb       rasterize() expanded to RGB, saved by PIL (the old render path)
+    palette   rasterize()'s two entry palette image, saved by PIL as 1 bit
+    stream    qrexport.write_png(), 1 bit rows straight from the matrix
+
+Every file is decoded again and compared pixel for pixel with the RGB one.
+
+Usage:
+    python benchmarks/bench_png.py [--versions 2 10 25 40] [--boxes 10 20] [--repeat 3] [--compress-level 6]
+"""
+import argparse
+import io
+import random
+import sys
+
+from common import best_of, payload_for_version
+
+import numpy as np
+from PIL import Image
+
+import qrexport
+from qrengine import ERROR_CORRECTION_MAP, QROptions, encode_matrix, rasterize
+
+FILL_COLOR = "Navy Blue"
+
+
+def save(image):
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+def stream(matrix, box_size):
+    out = io.BytesIO()
+    qrexport.write_png(matrix, out, box_size, fill_color=FILL_COLOR)
+    return out.getvalue()
+
+
+def same_pixels(data, reference):
+    with Image.open(io.BytesIO(data)) as image:
+        return np.array_equal(np.asarray(image.convert("RGB")), np.asarray(reference))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, nargs="+", default=[2, 10, 25, 40])
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--level", default="M", choices=sorted(ERROR_CORRECTION_MAP))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compress-level", type=int, default=qrexport.PNG_COMPRESS_LEVEL,
+                        help="zlib level for the stream writer")
+    args = parser.parse_args(argv)
+    qrexport.PNG_COMPRESS_LEVEL = args.compress_level
+
+    rng = random.Random(0)
+    mismatches = 0
+    totals = {"rgb": [0.0, 0], "palette": [0.0, 0], "stream": [0.0, 0]}
+
+    print(f"{'version':>7} {'box':>4} {'rgb ms':>8} {'rgb KB':>7} {'palette ms':>10} {'palette KB':>10} "
+          f"{'stream ms':>9} {'stream KB':>9} {'smaller':>7} match")
+    for version in args.versions:
+        payload = payload_for_version(version, ERROR_CORRECTION_MAP[args.level], rng)
+        matrix = encode_matrix(QROptions(data=payload, error_level=args.level))
+        for box_size in args.boxes:
+            rgb_time, rgb = best_of(
+                args.repeat, lambda: save(rasterize(matrix, box_size, fill_color=FILL_COLOR).convert("RGB"))
+            )
+            palette_time, palette = best_of(
+                args.repeat, lambda: save(rasterize(matrix, box_size, fill_color=FILL_COLOR))
+            )
+            stream_time, streamed = best_of(args.repeat, lambda: stream(matrix, box_size))
+
+            reference = rasterize(matrix, box_size, fill_color=FILL_COLOR).convert("RGB")
+            match = all(same_pixels(data, reference) for data in (rgb, palette, streamed))
+            mismatches += not match
+            for name, elapsed, data in (("rgb", rgb_time, rgb), ("palette", palette_time, palette),
+                                        ("stream", stream_time, streamed)):
+                totals[name][0] += elapsed
+                totals[name][1] += len(data)
+            print(f"{version:>7} {box_size:>4} {rgb_time * 1000:>8.2f} {len(rgb) / 1024:>7.1f} "
+                  f"{palette_time * 1000:>10.2f} {len(palette) / 1024:>10.1f} "
+                  f"{stream_time * 1000:>9.2f} {len(streamed) / 1024:>9.1f} "
+                  f"{len(rgb) / len(palette):>6.1f}x {'yes' if match else 'NO'}")
+
+    rgb_total, palette_total, stream_total = totals["rgb"], totals["palette"], totals["stream"]
+    print(f"{'total':>12} {rgb_total[0] * 1000:>8.2f} {rgb_total[1] / 1024:>7.1f} "
+          f"{palette_total[0] * 1000:>10.2f} {palette_total[1] / 1024:>10.1f} "
+          f"{stream_total[0] * 1000:>9.2f} {stream_total[1] / 1024:>9.1f} "
+          f"{rgb_total[1] / palette_total[1]:>6.1f}x")
+    if mismatches:
+        print(f"{mismatches} case(s) decoded to different pixels")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Segmentation benchmark: qrcode's greedy mode split vs the optimal one.
+
+For a set of real-world payload shapes it encodes every sample both ways,
+reports the versions and total modules each needs and how many modules the
+optimal split saves, and times both planners. Every optimal symbol is also
+built through the engine to check it really fits the planned version.
+
+Usage:
+    python benchmarks/bench_segments.py [--level M] [--count 50] [--repeat 3]
+"""
+import argparse
+import random
+import string
+import sys
+
+from common import best_of
+
+from qrcapacity import clear_cache, plan
+from qrengine import ERROR_CORRECTION_MAP, QROptions, build_qr
+
+
+def digits(rng, count):
+    return "".join(rng.choice(string.digits) for _ in range(count))
+
+
+def word(rng, count):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(count))
+
+
+PAYLOADS = {
+    "order url": lambda rng: f"https://shop.example.com/orders/{digits(rng, 18)}?item={digits(rng, 12)}",
+    "digital link": lambda rng: (
+        f"https://id.example.com/01/{digits(rng, 14)}/10/{word(rng, 6).upper()}/21/{digits(rng, 11)}"
+    ),
+    "tracking": lambda rng: f"https://track.example.com/?num=1Z{digits(rng, 16)}&lang=en",
+    "upper url": lambda rng: f"HTTPS://EXAMPLE.COM/P/{digits(rng, 10)}",
+    "vcard": lambda rng: (
+        f"BEGIN:VCARD\nVERSION:3.0\nN:{word(rng, 7).title()};{word(rng, 5).title()}\n"
+        f"TEL:+1{digits(rng, 10)}\nEND:VCARD"
+    ),
+    "id list": lambda rng: ",".join(digits(rng, 12) for _ in range(rng.randint(5, 30))),
+    "plain text": lambda rng: " ".join(word(rng, rng.randint(2, 9)) for _ in range(rng.randint(5, 40))),
+}
+
+
+def modules(version):
+    return (17 + 4 * version) ** 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--level", default="M", choices=sorted(ERROR_CORRECTION_MAP))
+    parser.add_argument("--count", type=int, default=50, help="samples per payload shape")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    totals = [0, 0]
+    failures = 0
+
+    print(f"{'payload':>12} {'greedy v':>8} {'optimal v':>9} {'modules':>9} {'saved':>7} "
+          f"{'greedy ms':>9} {'optimal ms':>10}")
+    for name, make in PAYLOADS.items():
+        samples = [make(rng) for _ in range(args.count)]
+        greedy_time, greedy = best_of(args.repeat, lambda: [plan(s, args.level)[0] for s in samples])
+        # Optimal splits are cached, so each timed run starts from an empty cache
+        optimal_time, optimal = best_of(
+            args.repeat, lambda: clear_cache() or [plan(s, args.level, "optimal")[0] for s in samples]
+        )
+
+        for payload, version in zip(samples, optimal):
+            qr = build_qr(QROptions(data=payload, error_level=args.level, segmentation="optimal"))
+            failures += qr.version != version
+
+        greedy_modules = sum(modules(version) for version in greedy)
+        optimal_modules = sum(modules(version) for version in optimal)
+        totals[0] += greedy_modules
+        totals[1] += optimal_modules
+        print(f"{name:>12} {sum(greedy) / len(greedy):>8.2f} {sum(optimal) / len(optimal):>9.2f} "
+              f"{greedy_modules - optimal_modules:>9} {1 - optimal_modules / greedy_modules:>7.1%} "
+              f"{greedy_time / len(samples) * 1000:>9.3f} {optimal_time / len(samples) * 1000:>10.3f}")
+
+    print(f"{'total':>12} {'':>8} {'':>9} {totals[0] - totals[1]:>9} {1 - totals[1] / totals[0]:>7.1%}")
+    if failures:
+        print(f"{failures} optimal symbol(s) didn't come out at the planned version")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
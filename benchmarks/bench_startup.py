@@ -0,0 +1,104 @@
+"""Startup time of the GUI, measured in fresh processes.
+
+    startup_import       importing qrgenerator (GUI toolkit included, engine deferred)
+    engine_import        importing the engine, paid on first generation
+    startup_first_paint  module start until the window shell is painted
+    startup_ready        module start until every panel is built and painted
+    startup_process      whole process, interpreter start to exit
+
+The paint stages need a display and are skipped without one. Results use
+the same JSON layout as bench_pipeline.py, so its compare command works on
+them too.
+
+Usage:
+    python benchmarks/bench_startup.py -o startup.json [--repeat 5]
+    python benchmarks/bench_pipeline.py compare old_startup.json startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def _run(args, env=None):
+    start = time.perf_counter()
+    result = subprocess.run(args, cwd=REPO, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return elapsed, result.stdout
+
+
+def import_time(module):
+    """Seconds to import module in a fresh interpreter"""
+    _, output = _run([sys.executable, "-c", IMPORT_SNIPPET.format(module=module)])
+    return float(output.strip().splitlines()[-1])
+
+
+def probe_gui():
+    """(process seconds, startup timings in ms) from one GUI launch that exits once ready"""
+    env = dict(os.environ, QRGEN_STARTUP_PROBE="1")
+    elapsed, output = _run([sys.executable, "qrgenerator.py"], env)
+    return elapsed, json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="startup_results.json")
+    parser.add_argument("--repeat", type=int, default=5, help="launches per measurement, fastest is kept")
+    args = parser.parse_args(argv)
+
+    timings = {}
+
+    def keep(stage, seconds):
+        timings[stage] = min(seconds, timings.get(stage, seconds))
+
+    for _ in range(args.repeat):
+        keep("startup_import", import_time("qrgenerator"))
+        keep("engine_import", import_time("qrengine"))
+
+    paint_error = None
+    for _ in range(args.repeat):
+        try:
+            elapsed, startup = probe_gui()
+        except RuntimeError as e:
+            paint_error = str(e)
+            break
+        keep("startup_process", elapsed)
+        keep("startup_first_paint", startup["first_paint_ms"] / 1000)
+        keep("startup_ready", startup["ready_ms"] / 1000)
+    if paint_error:
+        print(f"Skipping paint timings (no display?): {paint_error}", file=sys.stderr)
+
+    results = []
+    for stage, seconds in timings.items():
+        results.append({
+            "stage": stage, "version": None, "level": None, "size": None,
+            "wall_time": seconds, "peak_rss": None, "allocated_bytes": None,
+        })
+        print(f"{stage:>20} {seconds * 1000:>9.1f} ms", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"{len(results)} measurements written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Configure calls and time per theme toggle.
+
+Registers every entry of the GUI's THEMED_WIDGETS table with stand-in
+widgets that count configure() calls, toggles the theme and checks that
+each toggle makes at most one call per widget and that switching to the
+theme already shown makes none. With a display (--gui) the real window is
+built and toggles are timed too.
+
+Usage:
+    python benchmarks/bench_theme.py [--toggles 20] [--gui]
+"""
+import argparse
+import sys
+import time
+
+import common  # noqa: F401 (makes the top level modules importable)
+
+from qrgenerator import THEME_ROLES, THEMED_WIDGETS
+from qrtheme import ThemeRegistry
+
+
+class CountingWidget:
+    """Stand-in widget that counts configure() calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def configure(self, **options):
+        self.calls += 1
+
+
+def palettes(colors):
+    return {theme: {role: colors[f"{role}_{theme}"] for role in THEME_ROLES} for theme in ("light", "dark")}
+
+
+def count_calls(toggles):
+    # Same palette the app builds, minus the Tk root
+    colors = {}
+    for role in THEME_ROLES:
+        colors[f"{role}_light"] = f"light {role}"
+        colors[f"{role}_dark"] = f"dark {role}"
+    registry = ThemeRegistry(palettes(colors))
+    widgets = {name: registry.register(CountingWidget(), **roles) for name, roles in THEMED_WIDGETS.items()}
+
+    per_toggle = []
+    theme = "light"
+    for _ in range(toggles):
+        theme = "dark" if theme == "light" else "light"
+        per_toggle.append(registry.apply(theme))
+    repeat = registry.apply(theme)
+    most = max(widget.calls for widget in widgets.values())
+    return len(widgets), per_toggle, repeat, most / toggles
+
+
+def time_gui(toggles):
+    import customtkinter as ctk
+    from qrgenerator import ModernQRGenerator
+
+    root = ctk.CTk()
+    app = ModernQRGenerator(root)
+    root.update()
+    timings = []
+    for _ in range(toggles):
+        app.theme_switch.toggle()
+        start = time.perf_counter()
+        root.update()
+        timings.append(time.perf_counter() - start)
+    calls = app.theme.configure_calls
+    app.on_close()
+    return calls / toggles, min(timings), sorted(timings)[len(timings) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=20)
+    parser.add_argument("--gui", action="store_true", help="also time toggles on the real window (needs a display)")
+    args = parser.parse_args(argv)
+
+    widgets, per_toggle, repeat, per_widget = count_calls(args.toggles)
+    print(f"{widgets} themed widgets, configure calls per toggle: {max(per_toggle)} "
+          f"(re-applying the current theme: {repeat}, most calls on one widget per toggle: {per_widget:g})")
+    ok = max(per_toggle) <= widgets and repeat == 0 and per_widget <= 1
+
+    if args.gui:
+        calls, best, median = time_gui(args.toggles)
+        print(f"real window: {calls:g} configure calls per toggle, "
+              f"{best * 1000:.1f} ms best / {median * 1000:.1f} ms median per toggle")
+
+    print("OK" if ok else "FAIL: a toggle configured a widget more than once")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
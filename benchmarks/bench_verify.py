@@ -0,0 +1,98 @@
+"""Verification benchmark: decode-back cost per version and its effect on batch throughput.
+
+First times qrverify.verify_matrix() against encoding for a range of
+versions, checking every code decodes to its payload, both here and in a
+freshly spawned process that never encoded anything. Then renders the same
+generated manifest with qrbatch twice, without and with --verify, and
+reports codes per second for both. Verification runs in the worker pool
+alongside rendering, so the two rates should stay close. The batches run
+on freshly spawned workers: forked ones would inherit whatever this process
+encoded above, which the CLI's workers never have.
+
+Usage:
+    python benchmarks/bench_verify.py [--versions 1 10 25 40] [--rows 400] [--workers N] [--repeat 3]
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from common import best_of, payload_for_version
+
+import qrbatch
+from qrengine import ERROR_CORRECTION_MAP, QROptions, encode_matrix
+from qrverify import verify_matrix
+
+
+def write_manifest(path, rows, rng):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["payload", "error_level", "size"])
+        for _ in range(rows):
+            level = rng.choice("LMQH")
+            version = rng.randint(1, 15)
+            writer.writerow([payload_for_version(version, ERROR_CORRECTION_MAP[level], rng), level, rng.randint(1, 5)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, nargs="+", default=[1, 10, 25, 40])
+    parser.add_argument("--level", default="M", choices=sorted(ERROR_CORRECTION_MAP))
+    parser.add_argument("--rows", type=int, default=400, help="manifest rows for the batch comparison")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    failures = 0
+
+    codes = []
+    print(f"{'version':>7} {'encode ms':>9} {'verify ms':>9} {'ratio':>6} scans")
+    for version in args.versions:
+        options = QROptions(data=payload_for_version(version, ERROR_CORRECTION_MAP[args.level], rng),
+                            error_level=args.level)
+        encode_time, matrix = best_of(args.repeat, lambda: encode_matrix(options, cache=None))
+        verify_time, problem = best_of(args.repeat, lambda: verify_matrix(matrix, options))
+        failures += problem is not None
+        codes.append((version, options, matrix))
+        print(f"{version:>7} {encode_time * 1000:>9.2f} {verify_time * 1000:>9.2f} "
+              f"{verify_time / encode_time:>6.1%} {'yes' if problem is None else problem}")
+
+    # Decoding must not depend on anything encoding left behind in the process
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        problems = pool.submit(qrbatch.verify_chunk, codes).result()
+    failures += len(problems)
+    print(f"decoded in a fresh process: {len(codes) - len(problems)}/{len(codes)}")
+    for version, problem in problems:
+        print(f"  version {version}: {problem}")
+
+    folder = tempfile.mkdtemp(prefix="bench_verify_")
+    try:
+        manifest = os.path.join(folder, "manifest.csv")
+        write_manifest(manifest, args.rows, rng)
+        rates = {}
+        for verify in (False, True):
+            output = os.path.join(folder, "verified" if verify else "plain")
+            succeeded, batch_failures, seconds = qrbatch.run_batch(manifest, output, args.workers, verify=verify,
+                                                                   mp_context=multiprocessing.get_context("spawn"))
+            failures += len(batch_failures)
+            rates[verify] = (succeeded + len(batch_failures)) / seconds
+            print(f"{'verified' if verify else 'unverified':>10} batch: {succeeded}/{args.rows} in {seconds:.2f}s "
+                  f"({rates[verify]:.1f} codes/sec)")
+        print(f"verified throughput is {rates[True] / rates[False]:.0%} of unverified")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if failures:
+        print(f"{failures} code(s) failed verification")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
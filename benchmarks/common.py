@@ -0,0 +1,27 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+import time
+
+# Benchmarks run from a checkout, so make the top level modules importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qrcode import util  # noqa: E402
+
+
+def payload_for_version(version, error_correction, rng):
+    """Byte mode payload that fills the given version at the given level"""
+    bits = util.BIT_LIMIT_TABLE[error_correction][version] - 4 - util.length_in_bits(util.MODE_8BIT_BYTE, version)
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(bits // 8))
+
+
+def best_of(repeat, func):
+    """Run func repeat times, returning (fastest wall time, last result)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
@@ -0,0 +1,158 @@
+"""Streamed ZIP and tar export of many codes into a single archive.
+
+Codes are written into the archive one at a time, straight from their
+module matrices, so only one image is ever held in memory and nothing
+touches the disk except the archive itself. A manifest.csv mapping every
+file name to its payload is added last:
+
+    with QRArchive("codes.zip") as archive:
+        for options in codes:
+            archive.add("code.png", encode_matrix(options), options)
+
+The manifest has a column for every option a qrbatch manifest row can
+set, so running it through qrbatch regenerates the archive's codes.
+Borders and background colours have no column; they are always the
+defaults for codes made by qrbatch or the GUI.
+"""
+import csv
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+import qrmetrics
+from qrexport import export_format, write_matrix
+
+ARCHIVE_FORMATS = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar.gz",
+    ".tgz": "tar.gz",
+}
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = [
+    "filename", "payload", "error_level", "size", "pixels", "print_mm", "dpi", "color", "mask", "segments",
+]
+
+
+def archive_format(path):
+    """Archive format for a file name, ZIP unless the extension says otherwise"""
+    lower = path.lower()
+    for extension, fmt in ARCHIVE_FORMATS.items():
+        if lower.endswith(extension):
+            return fmt
+    return "zip"
+
+
+def manifest_row(name, modules, options):
+    """The MANIFEST_FIELDS values that make qrbatch.row_options() rebuild options"""
+    size = pixels = ""
+    if options.target_size is None and options.print_size_mm is None:
+        if options.box_size % 10 == 0 and 1 <= options.box_size // 10 <= 10:
+            size = options.box_size // 10
+        else:
+            # Off the slider scale, but an exact width gives the same box size back
+            pixels = (modules + 2 * options.border) * options.box_size
+    else:
+        pixels = options.target_size if options.target_size is not None else ""
+
+    def optional(value):
+        return "" if value is None else value
+    return [
+        name, options.data, options.error_level, size, pixels, optional(options.print_size_mm),
+        optional(options.dpi), options.fill_color, optional(options.mask_pattern), options.segmentation,
+    ]
+
+
+class QRArchive:
+    """Write many codes into one ZIP or tar archive as they are produced
+
+    target is a path or a writable binary file object; file objects don't
+    need to be seekable, so an archive can go straight to a socket or pipe.
+    """
+
+    def __init__(self, target, fmt=None):
+        self.fmt = fmt or (archive_format(target) if isinstance(target, (str, os.PathLike)) else "zip")
+        if self.fmt not in ARCHIVE_FORMATS.values():
+            raise ValueError(f"Unknown archive format: {self.fmt!r}")
+        self.mtime = time.time()
+        if self.fmt == "zip":
+            self.archive = zipfile.ZipFile(target, "w")
+        else:
+            # Stream mode ("w|") never seeks back, unlike "w:"
+            mode = "w|gz" if self.fmt == "tar.gz" else "w|"
+            if isinstance(target, (str, os.PathLike)):
+                self.archive = tarfile.open(target, mode)
+            else:
+                self.archive = tarfile.open(fileobj=target, mode=mode)
+        self.manifest = io.StringIO()
+        self.manifest_writer = csv.writer(self.manifest)
+        self.manifest_writer.writerow(MANIFEST_FIELDS)
+        self.names = set()
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def unique_name(self, name):
+        """name, or name with a numeric suffix if the archive already has one"""
+        name = os.path.basename(name)
+        stem, extension = os.path.splitext(name)
+        candidate = name
+        suffix = 2
+        while candidate in self.names or candidate == MANIFEST_NAME:
+            candidate = f"{stem}_{suffix}{extension}"
+            suffix += 1
+        self.names.add(candidate)
+        return candidate
+
+    def add(self, name, matrix, options, fmt=None):
+        """Write matrix as one archive entry and return the name it was stored under"""
+        # Fails before the entry is created, so an oversized code leaves no empty file
+        options.output_box_size(matrix.shape[0])
+        name = self.unique_name(name)
+        fmt = fmt or export_format(name)
+        with qrmetrics.stage("archive") as record:
+            if self.fmt == "zip":
+                info = zipfile.ZipInfo(name, date_time=time.localtime(self.mtime)[:6])
+                # PNG data is already deflated, compressing it again only costs time
+                info.compress_type = zipfile.ZIP_STORED if fmt == "png" else zipfile.ZIP_DEFLATED
+                with self.archive.open(info, "w") as out:
+                    write_matrix(matrix, out, options, fmt)
+            else:
+                # Tar headers come before the data and need its size, so the
+                # entry is encoded to memory first
+                out = io.BytesIO()
+                write_matrix(matrix, out, options, fmt)
+                self._add_bytes(name, out)
+            record["format"] = fmt
+        self.manifest_writer.writerow(manifest_row(name, matrix.shape[0], options))
+        self.count += 1
+        return name
+
+    def _add_bytes(self, name, data):
+        info = tarfile.TarInfo(name)
+        with data.getbuffer() as view:
+            info.size = view.nbytes
+        info.mtime = self.mtime
+        data.seek(0)
+        self.archive.addfile(info, data)
+
+    def close(self):
+        """Add the manifest and finish the archive"""
+        if self.archive is None:
+            return
+        manifest = self.manifest.getvalue().encode("utf-8")
+        if self.fmt == "zip":
+            info = zipfile.ZipInfo(MANIFEST_NAME, date_time=time.localtime(self.mtime)[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self.archive.writestr(info, manifest)
+        else:
+            self._add_bytes(MANIFEST_NAME, io.BytesIO(manifest))
+        self.archive.close()
+        self.archive = None
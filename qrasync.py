@@ -0,0 +1,165 @@
+"""Asyncio API for the headless engine.
+
+Encoding and drawing are CPU-bound and would stall an event loop if called
+directly, so everything here runs on a thread or process pool and is
+awaited:
+
+    async with AsyncRenderer(workers=4) as renderer:
+        png = await renderer.render(QROptions(data="https://example.com"))
+        async for index, body, error in renderer.render_many(payloads, ordered=False):
+            ...
+
+    svg = await render("https://example.com", fmt="svg")   # shared default renderer
+
+render_many() accepts a plain or async iterable of payload strings or
+QROptions and only reads as far ahead as the concurrency limit allows, so
+an endless stream is fine. Cancelling an awaiting task, or leaving an
+async for early, cancels the renders it started that haven't begun yet;
+renders already running on a worker finish and are discarded.
+
+Threads are cheapest to start and share the matrix cache, but qrcode's
+encoder is pure Python and holds the GIL, which delays the loop a little
+while many codes are encoded. Worker processes keep the loop almost
+perfectly responsive (see benchmarks/bench_async.py).
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+
+from qrengine import QROptions
+from qrexport import render_bytes
+
+_default_renderer = None
+
+
+class AsyncRenderer:
+    """Renders QR codes on a worker pool for asyncio code
+
+    At most max_concurrency renders are submitted to the pool at once
+    (default: twice the workers); further calls wait their turn without
+    blocking the loop.
+    """
+
+    def __init__(self, workers=None, max_concurrency=None, processes=False, defaults=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers * 2
+        if self.max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1 (got {self.max_concurrency})")
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.pool = executor(max_workers=self.workers)
+        # Settings for payloads given as plain strings
+        self.defaults = defaults or QROptions(data="")
+        # Created per event loop, since a semaphore can't be shared between loops
+        self._slots = None
+        self._slots_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self, cancel_pending=True):
+        """Shut the pool down without waiting; queued renders are dropped unless cancel_pending is False"""
+        self.pool.shutdown(wait=False, cancel_futures=cancel_pending)
+
+    def options_for(self, payload):
+        """QROptions for a payload string (using the defaults) or QROptions as is"""
+        if isinstance(payload, QROptions):
+            return payload
+        return replace(self.defaults, data=str(payload))
+
+    async def render(self, payload, fmt="png"):
+        """Render a payload string or QROptions and return the file as bytes
+
+        Invalid options raise their ValueError here, as rendering them on
+        the pool would.
+        """
+        options = self.options_for(payload)
+        options.validate()
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots_loop = loop
+        async with self._slots:
+            # Cancelling this await cancels the pool future too, so a render
+            # that hasn't started yet never runs
+            return await loop.run_in_executor(self.pool, render_bytes, options, fmt)
+
+    async def render_many(self, payloads, fmt="png", ordered=True):
+        """Render a plain or async iterable of payloads, yielding (index, body, error)
+
+        index is the payload's position in the input and error a message or
+        None. Results come in input order, or with ordered=False as soon as
+        each one is done. Errors are reported per payload, so one bad entry
+        never stops the rest.
+        """
+        async def attempt(index, payload):
+            try:
+                return index, await self.render(payload, fmt), None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return index, None, str(e)
+
+        source = _aiter(payloads)
+        pending = set()
+        # Finished out of order, held back until their turn when ordered
+        finished = {}
+        next_index = 0
+        exhausted = False
+        count = 0
+        try:
+            while True:
+                # Tasks beyond the limit would only queue on the semaphore, so
+                # the input is read no further ahead than can actually run
+                while not exhausted and len(pending) + len(finished) < self.max_concurrency:
+                    try:
+                        payload = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.add(asyncio.ensure_future(attempt(count, payload)))
+                    count += 1
+                if not pending and not finished:
+                    return
+                if pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result = task.result()
+                        finished[result[0]] = result
+                if ordered:
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+                else:
+                    for index in list(finished):
+                        yield finished.pop(index)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _aiter(payloads):
+    if hasattr(payloads, "__aiter__"):
+        async for payload in payloads:
+            yield payload
+    else:
+        for payload in payloads:
+            yield payload
+
+
+def default_renderer():
+    """The AsyncRenderer shared by render(), a thread pool created on first use"""
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = AsyncRenderer()
+    return _default_renderer
+
+
+async def render(payload, fmt="png"):
+    """Render a payload string or QROptions on the default renderer and return the file as bytes"""
+    return await default_renderer().render(payload, fmt)
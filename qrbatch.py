@@ -0,0 +1,323 @@
+"""Batch QR code generation from a CSV or JSONL manifest.
+
+Each manifest row describes one code:
+
+    payload,filename,error_level,size,color
+    https://example.com/1,first.png,M,5,Black
+
+Only ``payload`` is required. ``size`` uses the same 1-10 scale as the GUI
+slider and ``color`` accepts a UI color name or any PIL color string. An
+optional ``mask`` column (0-7) pins the mask pattern. Instead of ``size``,
+``pixels`` asks for an exact output width, and ``print_mm`` with ``dpi`` for
+a physical print size. ``segments`` set to ``optimal`` encodes the payload
+in the mode split needing the fewest bits instead of qrcode's own
+(``greedy``). The ``filename`` extension picks the format: .png (default),
+.svg or .pdf. A file name used more than once gets a numeric suffix
+(``code_2.png``), in a folder as in an archive.
+
+With ``--archive`` every code is streamed into one ZIP or tar file (with a
+manifest.csv of file names and payloads) instead of a folder. ``--cache``
+copies codes exported before (by the GUI or an earlier run) from the
+render cache in the output folder, or in the given directory, instead of
+rendering them again. ``--verify`` decodes every code back and reports the
+ones that don't scan as their payload (or are low contrast) as failures;
+the checks run in the worker pool alongside the rendering of later chunks.
+
+Usage:
+    python qrbatch.py manifest.csv [-o OUTPUT_DIR [--cache [DIR]] | -a ARCHIVE] [--verify] [--workers N]
+        [--chunk-size N]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+
+from qrarchive import QRArchive
+from qrdiskcache import DiskCache, cached_export, default_cache_dir
+from qrengine import DEFAULT_OUTPUT_FOLDER, QROptions, encode_matrix
+from qrverify import verify_matrix
+
+DEFAULT_SIZE = 5
+DEFAULT_CHUNK_SIZE = 32
+
+
+def read_manifest(path):
+    """Yield (line_number, row dict) pairs from a CSV or JSONL manifest"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {"_error": f"invalid JSON: {e}"}
+                yield line_number, row
+    else:
+        # utf-8-sig drops the byte order mark Excel's "CSV UTF-8" starts with
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            # Header is line 1, so data rows start at line 2
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+
+
+def row_options(row):
+    """Build QROptions from a manifest row, using the GUI defaults for missing fields"""
+    if not isinstance(row, dict):
+        # A JSONL line can hold any JSON value
+        raise ValueError("row must be an object")
+    if "_error" in row:
+        raise ValueError(row["_error"])
+    payload = row.get("payload")
+    if not payload:
+        raise ValueError("missing payload")
+    size = int(row.get("size") or DEFAULT_SIZE)
+    if not 1 <= size <= 10:
+        raise ValueError(f"size must be between 1 and 10 (got {size})")
+    mask = row.get("mask")
+    pixels = row.get("pixels")
+    print_mm = row.get("print_mm")
+    dpi = row.get("dpi")
+    return QROptions(
+        data=str(payload),
+        error_level=(row.get("error_level") or "M").upper(),
+        box_size=size * 10,
+        fill_color=row.get("color") or "Black",
+        back_color="white",
+        mask_pattern=int(mask) if mask not in (None, "") else None,
+        target_size=int(pixels) if pixels not in (None, "") else None,
+        print_size_mm=float(print_mm) if print_mm not in (None, "") else None,
+        dpi=int(dpi) if dpi not in (None, "") else None,
+        segmentation=row.get("segments") or "greedy"
+    )
+
+
+def row_filename(row, line_number, timestamp):
+    """Output file name for a row, confined to the output folder"""
+    filename = os.path.basename(str(row.get("filename") or ""))
+    if not filename:
+        filename = f"QRCode_{timestamp}_{line_number}.png"
+    if not os.path.splitext(filename)[1]:
+        filename += ".png"
+    return filename
+
+
+def unique_filenames(rows, timestamp):
+    """Yield (line_number, row, file name) with repeated names numbered like QRArchive.unique_name
+
+    Runs in the parent, so rows handed to different workers never write the
+    same file. Rows that aren't objects get no name; they fail in the worker.
+    """
+    taken = set()
+    for line_number, row in rows:
+        filename = None
+        if isinstance(row, dict):
+            filename = row_filename(row, line_number, timestamp)
+            stem, extension = os.path.splitext(filename)
+            suffix = 2
+            # Compared case-insensitively, since Code.png and code.png are one
+            # file on Windows and macOS
+            while filename.casefold() in taken:
+                filename = f"{stem}_{suffix}{extension}"
+                suffix += 1
+            taken.add(filename.casefold())
+        yield line_number, row, filename
+
+
+def render_chunk(chunk, output_folder, cache_dir=None, verify=False):
+    """Render every (line_number, row, file name) of a chunk, returning (line_number, result, error) per row
+
+    Runs inside a worker process. Errors are reported per row so one bad
+    entry never aborts the rest of the chunk. With a cache_dir, codes found
+    in that render cache are copied instead of rendered. result is the
+    path, or with verify (path, options, matrix) to check afterwards.
+    """
+    cache = DiskCache(cache_dir) if cache_dir else None
+    results = []
+    for line_number, row, filename in chunk:
+        try:
+            options = row_options(row)
+            path = os.path.join(output_folder, filename)
+            matrix = encode_matrix(options, cache=None) if verify else None
+            cached_export(cache, options, path, matrix=matrix)
+            results.append((line_number, (path, options, matrix) if verify else path, None))
+        except Exception as e:
+            results.append((line_number, None, str(e)))
+    return results
+
+
+def encode_rows(chunk, timestamp):
+    """Encode every row of a chunk for an archive, returning (line_number, result, error) per row
+
+    result is (filename, options, QRMatrix). Runs inside a worker process;
+    the archive itself is written by the parent, one code at a time.
+    """
+    results = []
+    for line_number, row in chunk:
+        try:
+            options = row_options(row)
+            matrix = encode_matrix(options, cache=None)
+            results.append((line_number, (row_filename(row, line_number, timestamp), options, matrix), None))
+        except Exception as e:
+            results.append((line_number, None, str(e)))
+    return results
+
+
+def encode_chunk(options_list):
+    """Encode a chunk of QROptions, returning (QRMatrix, error) per entry
+
+    Runs inside a worker process; bit-packed matrices are cheap to send back.
+    """
+    results = []
+    for options in options_list:
+        try:
+            results.append((encode_matrix(options, cache=None), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def verify_chunk(items):
+    """Decode back every (line_number, options, matrix), returning (line_number, problem) per failure
+
+    Runs inside a worker process, see qrverify.verify_matrix().
+    """
+    problems = []
+    for line_number, options, matrix in items:
+        try:
+            problem = verify_matrix(matrix, options)
+        except Exception as e:
+            problem = f"couldn't be verified: {e}"
+        if problem:
+            problems.append((line_number, problem))
+    return problems
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(manifest, output_folder=DEFAULT_OUTPUT_FOLDER, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              progress=None, archive=None, cache_dir=None, verify=False, mp_context=None):
+    """Render every row of a manifest in parallel and return (succeeded, failures, seconds)
+
+    failures is a list of (line_number, error message). progress, if given,
+    is called with (done, failed) after each finished chunk. If archive (a
+    path or binary file object) is given, codes go into that ZIP or tar
+    archive instead of output_folder. cache_dir names a render cache
+    directory (see qrdiskcache) for folder output. With verify, each
+    finished chunk's codes are decoded back in the same pool while later
+    chunks render, and codes that fail move from succeeded to failures
+    (their files are still written). mp_context is passed on to the
+    ProcessPoolExecutor.
+    """
+    if archive is None:
+        os.makedirs(output_folder, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    workers = workers or os.cpu_count() or 1
+    succeeded = 0
+    failures = []
+    start = time.perf_counter()
+
+    writer = QRArchive(archive) if archive is not None else nullcontext()
+    with writer, ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        rows = read_manifest(manifest)
+        chunks = _chunks(rows if archive is not None else unique_filenames(rows, timestamp), chunk_size)
+        pending = set()
+        # Verification futures, told apart from render ones when they finish
+        checks = set()
+        # Keep a couple of chunks per worker in flight so huge manifests are
+        # never read into memory all at once
+        max_pending = workers * 2
+        while True:
+            for chunk in islice(chunks, max(0, max_pending - len(pending))):
+                if archive is None:
+                    pending.add(pool.submit(render_chunk, chunk, output_folder, cache_dir, verify))
+                else:
+                    pending.add(pool.submit(encode_rows, chunk, timestamp))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in checks:
+                    checks.discard(future)
+                    for line_number, problem in future.result():
+                        succeeded -= 1
+                        failures.append((line_number, f"verification failed: {problem}"))
+                    if progress:
+                        progress(succeeded + len(failures), len(failures))
+                    continue
+                to_verify = []
+                for line_number, result, error in future.result():
+                    if error is None and archive is not None:
+                        filename, options, matrix = result
+                        try:
+                            writer.add(filename, matrix, options)
+                        except ValueError as e:
+                            error = str(e)
+                    if error is None:
+                        succeeded += 1
+                        if verify:
+                            to_verify.append((line_number,) + tuple(result[1:]))
+                    else:
+                        failures.append((line_number, error))
+                if to_verify:
+                    check = pool.submit(verify_chunk, to_verify)
+                    checks.add(check)
+                    pending.add(check)
+                if progress:
+                    progress(succeeded + len(failures), len(failures))
+
+    return succeeded, failures, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate QR codes in bulk from a CSV or JSONL manifest.")
+    parser.add_argument("manifest", help="CSV (with header) or JSONL file, one code per row")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_FOLDER,
+                        help=f"output folder (default: {DEFAULT_OUTPUT_FOLDER})")
+    parser.add_argument("-a", "--archive", default=None,
+                        help="write every code into this .zip, .tar or .tar.gz file instead of a folder")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="reuse earlier exports from a render cache (default: .qrcache in the output folder)")
+    parser.add_argument("--verify", action="store_true",
+                        help="decode every code back and report the ones that don't scan as failures")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows sent to a worker at a time (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    def progress(done, failed):
+        sys.stderr.write(f"\r{done} processed, {failed} failed")
+        sys.stderr.flush()
+
+    cache_dir = None
+    if args.cache is not None and args.archive is None:
+        cache_dir = args.cache or default_cache_dir(args.output)
+    succeeded, failures, seconds = run_batch(args.manifest, args.output, args.workers, args.chunk_size, progress,
+                                             args.archive, cache_dir, args.verify)
+    sys.stderr.write("\n")
+
+    for line_number, error in sorted(failures):
+        print(f"line {line_number}: {error}", file=sys.stderr)
+    total = succeeded + len(failures)
+    rate = total / seconds if seconds else 0.0
+    destination = args.archive or args.output
+    print(f"{succeeded}/{total} QR codes written to {destination} in {seconds:.2f}s ({rate:.1f} codes/sec)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,521 @@
+"""Batch tab of the GUI: many codes at once in a virtualized thumbnail grid.
+
+Payloads are encoded in worker processes and kept as bit-packed module
+matrices, a few hundred bytes per code. The grid is a plain Canvas whose
+scroll region covers every entry, but only the rows in view have canvas
+items and PhotoImages; rows that scroll out of view are deleted again, so
+memory stays flat however many codes the batch holds.
+"""
+import os
+import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from tkinter import filedialog
+
+import customtkinter as ctk
+from PIL import ImageTk
+
+from qrarchive import QRArchive
+from qrbatch import encode_chunk, read_manifest, row_filename, row_options, unique_filenames
+from qrdiskcache import cached_export
+from qrengine import LRUCache, preview_image
+
+THUMBNAIL_SIZE = 112
+CELL_PADDING = 14
+CAPTION_HEIGHT = 18
+CELL_WIDTH = THUMBNAIL_SIZE + CELL_PADDING
+CELL_HEIGHT = THUMBNAIL_SIZE + CAPTION_HEIGHT + CELL_PADDING
+
+# Entries sent to a worker process at a time
+ENCODE_CHUNK_SIZE = 32
+
+# How often the UI checks on encoding and saving (ms)
+BATCH_POLL_MS = 50
+
+PLACEHOLDER = "One payload per line..."
+
+
+class BatchEntry:
+    """One code of a batch; its QRMatrix stays bit-packed until drawn or saved"""
+    __slots__ = ("options", "filename", "number", "matrix", "error")
+
+    def __init__(self, options, number, filename=None, error=None):
+        self.options = options
+        self.number = number
+        self.filename = filename
+        self.matrix = None
+        self.error = error
+
+    @property
+    def done(self):
+        return self.matrix is not None or self.error is not None
+
+    def caption(self):
+        if self.error is not None:
+            return f"⚠️ {self.error}"
+        text = self.filename or self.options.data
+        return text if len(text) <= 16 else text[:15] + "…"
+
+
+class BatchView:
+    """Batch tab: payload list on the left, thumbnail grid and save actions on the right"""
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.root = app.root
+        colors = app.colors
+        fonts = app.fonts
+
+        self.frame = ctk.CTkFrame(parent, corner_radius=0, fg_color=colors["bg_light"])
+        self.frame.grid_columnconfigure(0, weight=3)
+        self.frame.grid_columnconfigure(1, weight=4)
+        self.frame.grid_rowconfigure(0, weight=1)
+
+        # Left panel - payloads
+        self.left_panel = ctk.CTkFrame(self.frame, corner_radius=15, fg_color=colors["card_light"])
+        self.left_panel.grid(row=0, column=0, padx=(30, 15), pady=30, sticky="nsew")
+        self.left_panel.grid_columnconfigure(0, weight=1)
+        self.left_panel.grid_rowconfigure(2, weight=1)
+
+        self.input_label = ctk.CTkLabel(
+            self.left_panel,
+            text="Batch",
+            font=fonts["subtitle"],
+            text_color=colors["text_light"]
+        )
+        self.input_label.grid(row=0, column=0, padx=20, pady=(20, 0), sticky="w")
+
+        self.input_sublabel = ctk.CTkLabel(
+            self.left_panel,
+            text="One code per line, using the Single tab's settings",
+            font=fonts["small"],
+            text_color=colors["text_light"]
+        )
+        self.input_sublabel.grid(row=1, column=0, padx=20, pady=(5, 10), sticky="w")
+
+        self.data_input = ctk.CTkTextbox(
+            self.left_panel,
+            corner_radius=8,
+            border_width=1,
+            border_color=colors["border_light"],
+            font=fonts["body"],
+            fg_color=colors["bg_light"],
+            text_color=colors["text_light"]
+        )
+        self.data_input.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="nsew")
+        self.data_input.insert("0.0", PLACEHOLDER)
+        self.data_input.bind("<FocusIn>", self.on_input_focus_in)
+
+        self.button_frame = ctk.CTkFrame(self.left_panel, fg_color="transparent")
+        self.button_frame.grid(row=3, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.button_frame.grid_columnconfigure((0, 1, 2), weight=1)
+
+        self.import_button = ctk.CTkButton(
+            self.button_frame,
+            text="📂 Import",
+            command=self.import_file,
+            font=fonts["button"],
+            fg_color=colors["accent"],
+            hover_color=colors["accent_hover"],
+            corner_radius=8,
+            height=42,
+            text_color=colors["bg_light"]
+        )
+        self.import_button.grid(row=0, column=0, padx=(0, 5), sticky="ew")
+
+        self.generate_button = ctk.CTkButton(
+            self.button_frame,
+            text="✨ Generate All",
+            command=self.generate_all,
+            font=fonts["button"],
+            fg_color=colors["success"],
+            hover_color=colors["success_hover"],
+            corner_radius=8,
+            height=42,
+            text_color=colors["bg_light"]
+        )
+        self.generate_button.grid(row=0, column=1, padx=5, sticky="ew")
+
+        self.clear_button = ctk.CTkButton(
+            self.button_frame,
+            text="🗑️ Clear",
+            command=self.clear,
+            font=fonts["button"],
+            fg_color=colors["error"],
+            hover_color=colors["error_hover"],
+            corner_radius=8,
+            height=42,
+            text_color=colors["bg_light"]
+        )
+        self.clear_button.grid(row=0, column=2, padx=(5, 0), sticky="ew")
+
+        # Right panel - thumbnail grid
+        self.right_panel = ctk.CTkFrame(self.frame, corner_radius=15, fg_color=colors["card_light"])
+        self.right_panel.grid(row=0, column=1, padx=(15, 30), pady=30, sticky="nsew")
+        self.right_panel.grid_columnconfigure(0, weight=1)
+        self.right_panel.grid_rowconfigure(1, weight=1)
+
+        self.grid_header = ctk.CTkFrame(self.right_panel, fg_color="transparent")
+        self.grid_header.grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 10), sticky="ew")
+        self.grid_header.grid_columnconfigure(0, weight=1)
+
+        self.grid_label = ctk.CTkLabel(
+            self.grid_header,
+            text="Codes",
+            font=fonts["subtitle"],
+            text_color=colors["text_light"]
+        )
+        self.grid_label.grid(row=0, column=0, sticky="w")
+
+        self.save_folder_button = ctk.CTkButton(
+            self.grid_header,
+            text="💾 Save All",
+            command=lambda: self.save_all(archive=False),
+            font=fonts["button"],
+            fg_color=colors["accent"],
+            hover_color=colors["accent_hover"],
+            corner_radius=8,
+            height=36,
+            width=110,
+            text_color=colors["bg_light"],
+            state="disabled"
+        )
+        self.save_folder_button.grid(row=0, column=1, padx=(10, 0), sticky="e")
+
+        self.save_zip_button = ctk.CTkButton(
+            self.grid_header,
+            text="🗜️ Save ZIP",
+            command=lambda: self.save_all(archive=True),
+            font=fonts["button"],
+            fg_color=colors["accent"],
+            hover_color=colors["accent_hover"],
+            corner_radius=8,
+            height=36,
+            width=110,
+            text_color=colors["bg_light"],
+            state="disabled"
+        )
+        self.save_zip_button.grid(row=0, column=2, padx=(10, 0), sticky="e")
+
+        self.canvas = tk.Canvas(self.right_panel, highlightthickness=0, bd=0, bg=colors["bg_light"])
+        self.canvas.grid(row=1, column=0, padx=(20, 0), pady=(0, 10), sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self.right_panel, command=self.canvas.yview)
+        self.scrollbar.grid(row=1, column=1, padx=(0, 10), pady=(0, 10), sticky="ns")
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.bind("<Configure>", lambda event: self.layout())
+        # Windows/macOS report wheel deltas, X11 sends buttons 4 and 5
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+
+        self.progress = ctk.CTkProgressBar(self.right_panel, progress_color=colors["accent"])
+        self.progress.grid(row=2, column=0, columnspan=2, padx=20, pady=(0, 20), sticky="ew")
+        self.progress.set(0)
+
+        self.entries = []
+        # Entry index -> PhotoImage (or None) for the cells currently drawn
+        self.cells = {}
+        self.columns = 1
+        self.thumbnail_cache = LRUCache(max_entries=256, max_bytes=8 * 1024 * 1024)
+
+        # Encoding runs in worker processes, saving on one background thread
+        self.encode_pool = None
+        self.save_executor = ThreadPoolExecutor(max_workers=1)
+        self.generation = 0
+        self.pending = []
+        self.saving = None
+        self.saved = 0
+
+        # Built with light colours like the main window, then brought up to the current theme
+        theme = app.theme
+        theme.register(self.frame, fg_color="bg")
+        theme.register(self.left_panel, fg_color="card")
+        theme.register(self.right_panel, fg_color="card")
+        theme.register(self.input_label, text_color="text")
+        theme.register(self.input_sublabel, text_color="text")
+        theme.register(self.grid_label, text_color="text")
+        theme.register(self.data_input, border_color="border", fg_color="bg", text_color="text")
+        theme.register(self.canvas, bg="bg")
+        theme.listen(self.update_theme)
+        theme.apply()
+        self.update_theme(theme)
+
+    def show(self, row, column):
+        self.frame.grid(row=row, column=column, sticky="nsew")
+
+    def hide(self):
+        self.frame.grid_remove()
+
+    def update_theme(self, theme):
+        self.caption_color = theme.color("text")
+        self.placeholder_color = theme.color("border")
+        # Captions and placeholders are canvas items, so redraw what is visible
+        self.redraw()
+
+    def on_input_focus_in(self, event):
+        if self.data_input.get("0.0", "end-1c") == PLACEHOLDER:
+            self.data_input.delete("0.0", "end")
+
+    # Grid
+
+    def layout(self):
+        """Size the scroll region for every entry and draw the cells in view"""
+        columns = max(1, self.canvas.winfo_width() // CELL_WIDTH)
+        if columns != self.columns:
+            self.columns = columns
+            self.clear_cells()
+        rows = -(-len(self.entries) // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.columns * CELL_WIDTH, rows * CELL_HEIGHT + CELL_PADDING))
+        self.update_visible()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.update_visible()
+
+    def on_mousewheel(self, event):
+        step = -event.delta if abs(event.delta) < 120 else -event.delta // 120
+        self.canvas.yview_scroll(step, "units")
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        # One extra row either side keeps small scrolls from showing blanks
+        first_row = max(0, int(top // CELL_HEIGHT) - 1)
+        last_row = int(bottom // CELL_HEIGHT) + 1
+        return range(first_row * self.columns, min(len(self.entries), (last_row + 1) * self.columns))
+
+    def update_visible(self):
+        visible = self.visible_range()
+        # Release cells that scrolled away, their PhotoImages go with them
+        for index in [index for index in self.cells if index not in visible]:
+            self.canvas.delete(f"cell{index}")
+            del self.cells[index]
+        for index in visible:
+            if index not in self.cells:
+                self.draw_cell(index)
+
+    def draw_cell(self, index):
+        entry = self.entries[index]
+        x = (index % self.columns) * CELL_WIDTH + CELL_PADDING // 2
+        y = (index // self.columns) * CELL_HEIGHT + CELL_PADDING
+        tag = f"cell{index}"
+        photo = None
+        if entry.matrix is not None:
+            thumbnail = preview_image(entry.matrix, entry.options, THUMBNAIL_SIZE, self.thumbnail_cache)
+            photo = ImageTk.PhotoImage(thumbnail)
+            self.canvas.create_image(x, y, image=photo, anchor="nw", tags=tag)
+        else:
+            self.canvas.create_rectangle(
+                x, y, x + THUMBNAIL_SIZE, y + THUMBNAIL_SIZE,
+                outline=self.placeholder_color, dash=(4, 4) if not entry.done else None, tags=tag
+            )
+        caption = entry.caption() if entry.done else "…"
+        self.canvas.create_text(
+            x + THUMBNAIL_SIZE // 2, y + THUMBNAIL_SIZE + CAPTION_HEIGHT // 2,
+            text=caption, width=THUMBNAIL_SIZE, fill=self.caption_color,
+            font=self.app.fonts["tiny"], tags=tag
+        )
+        self.cells[index] = photo
+
+    def clear_cells(self):
+        self.canvas.delete("all")
+        self.cells.clear()
+
+    def redraw(self, indices=None):
+        """Redraw the given entries (default: all) if they are on screen"""
+        for index in list(self.cells) if indices is None else indices:
+            if index in self.cells:
+                self.canvas.delete(f"cell{index}")
+                self.draw_cell(index)
+
+    # Generation
+
+    def entries_from_text(self):
+        text = self.data_input.get("0.0", "end-1c")
+        if text == PLACEHOLDER:
+            return []
+        lines = [line.strip() for line in text.splitlines()]
+        return [BatchEntry(self.app.current_options(line), number) for number, line in enumerate(lines, 1) if line]
+
+    def generate_all(self):
+        entries = self.entries_from_text()
+        if not entries:
+            self.app.show_notification("Enter at least one payload, one per line.", "error")
+            return
+        self.start(entries)
+
+    def import_file(self):
+        """Load payloads from a text file, or render a CSV/JSONL manifest with its own settings"""
+        path = filedialog.askopenfilename(
+            initialdir=self.app.output_folder,
+            filetypes=[("Payload lists", "*.txt *.csv *.jsonl *.ndjson"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            if path.lower().endswith((".csv", ".jsonl", ".ndjson")):
+                entries = []
+                for line_number, row in read_manifest(path):
+                    try:
+                        entries.append(BatchEntry(row_options(row), line_number, row.get("filename")))
+                    except ValueError as e:
+                        entries.append(BatchEntry(None, line_number, error=str(e)))
+                if not entries:
+                    self.app.show_notification("The manifest has no rows.", "error")
+                    return
+                self.start(entries)
+            else:
+                with open(path, encoding="utf-8-sig") as f:
+                    text = f.read()
+                self.data_input.delete("0.0", "end")
+                self.data_input.insert("0.0", text)
+                self.generate_all()
+        except (OSError, UnicodeDecodeError) as e:
+            self.app.show_notification(f"Failed to import: {e}", "error")
+
+    def start(self, entries):
+        """Encode entries in the background, filling in the grid as chunks finish"""
+        self.cancel()
+        self.entries = entries
+        self.clear_cells()
+        self.canvas.yview_moveto(0)
+        self.layout()
+        self.set_save_state("disabled")
+        self.progress.set(0)
+
+        if self.encode_pool is None:
+            self.encode_pool = ProcessPoolExecutor()
+        work = [(index, entry) for index, entry in enumerate(entries) if not entry.done]
+        self.pending = []
+        for start in range(0, len(work), ENCODE_CHUNK_SIZE):
+            chunk = work[start:start + ENCODE_CHUNK_SIZE]
+            future = self.encode_pool.submit(encode_chunk, [entry.options for _, entry in chunk])
+            self.pending.append(([index for index, _ in chunk], future))
+
+        self.app.status_label.configure(text=f"⏳ Generating {len(entries)} QR codes...")
+        self.root.after(BATCH_POLL_MS, self.poll_generation, self.generation)
+
+    def poll_generation(self, generation):
+        # A newer batch or a clear makes this one stale
+        if generation != self.generation:
+            return
+        still_pending = []
+        for indices, future in self.pending:
+            if not future.done():
+                still_pending.append((indices, future))
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [(None, str(e))] * len(indices)
+            for index, (matrix, error) in zip(indices, results):
+                self.entries[index].matrix = matrix
+                self.entries[index].error = error
+            self.redraw(indices)
+        self.pending = still_pending
+
+        done = sum(1 for entry in self.entries if entry.done)
+        self.progress.set(done / len(self.entries))
+        if self.pending:
+            self.app.status_label.configure(text=f"⏳ Generated {done}/{len(self.entries)} QR codes...")
+            self.root.after(BATCH_POLL_MS, self.poll_generation, generation)
+            return
+
+        failed = sum(1 for entry in self.entries if entry.error is not None)
+        self.update_save_state()
+        message = f"{done - failed} QR codes generated" + (f", {failed} failed" if failed else "")
+        self.app.show_notification(message, "warning" if failed else "success")
+
+    def cancel(self):
+        self.generation += 1
+        for _, future in self.pending:
+            future.cancel()
+        self.pending = []
+
+    def clear(self):
+        self.cancel()
+        self.entries = []
+        self.clear_cells()
+        self.layout()
+        self.progress.set(0)
+        self.set_save_state("disabled")
+        self.data_input.delete("0.0", "end")
+        self.data_input.insert("0.0", PLACEHOLDER)
+        self.app.show_notification("Batch cleared", "info")
+
+    # Saving
+
+    def update_save_state(self):
+        """Enable saving only when the batch is fully generated, has a code and nothing is being saved"""
+        has_codes = any(entry.matrix is not None for entry in self.entries)
+        ready = not self.pending and self.saving is None and has_codes
+        self.set_save_state("normal" if ready else "disabled")
+
+    def set_save_state(self, state):
+        self.save_folder_button.configure(state=state)
+        self.save_zip_button.configure(state=state)
+
+    def save_all(self, archive):
+        """Save every generated code to a folder or a single archive in the background"""
+        if self.saving is not None:
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if archive:
+            path = filedialog.asksaveasfilename(
+                initialdir=self.app.ensure_output_folder(),
+                initialfile=f"QRCode_{timestamp}.zip",
+                defaultextension=".zip",
+                filetypes=[("ZIP archives", "*.zip"), ("Tar archives", "*.tar *.tar.gz *.tgz"), ("All files", "*.*")]
+            )
+        else:
+            path = filedialog.askdirectory(initialdir=self.app.ensure_output_folder(), mustexist=False)
+        if not path:
+            return
+
+        entries = [entry for entry in self.entries if entry.matrix is not None]
+        self.saved = 0
+        cache = None if archive else self.app.disk_cache()
+        self.saving = self.save_executor.submit(self.write_all, entries, path, archive, timestamp, cache)
+        self.set_save_state("disabled")
+        self.root.after(BATCH_POLL_MS, self.poll_save, path, len(entries))
+
+    def write_all(self, entries, path, archive, timestamp, cache=None):
+        # Runs on the save thread - must not touch any widget. Only one
+        # code's matrix is unpacked at a time.
+        if archive:
+            with QRArchive(path) as writer:
+                for entry in entries:
+                    name = row_filename({"filename": entry.filename}, entry.number, timestamp)
+                    writer.add(name, entry.matrix, entry.options)
+                    self.saved += 1
+        else:
+            os.makedirs(path, exist_ok=True)
+            # Numbered like archive entries, so rows sharing a name don't overwrite each other
+            rows = ((entry.number, {"filename": entry.filename}) for entry in entries)
+            for entry, (_, _, name) in zip(entries, unique_filenames(rows, timestamp)):
+                cached_export(cache, entry.options, os.path.join(path, name), matrix=entry.matrix)
+                self.saved += 1
+
+    def poll_save(self, path, total):
+        if not self.saving.done():
+            self.progress.set(self.saved / total)
+            self.app.status_label.configure(text=f"⏳ Saved {self.saved}/{total} QR codes...")
+            self.root.after(BATCH_POLL_MS, self.poll_save, path, total)
+            return
+        future, self.saving = self.saving, None
+        # A batch started during the save may still be generating
+        self.update_save_state()
+        if not self.pending:
+            self.progress.set(1)
+        try:
+            future.result()
+        except Exception as e:
+            self.app.show_notification(f"Failed to save QR codes: {e}", "error")
+            return
+        self.app.show_notification(f"{total} QR codes saved to {os.path.basename(path)}", "success")
+
+    def shutdown(self):
+        self.cancel()
+        if self.encode_pool is not None:
+            self.encode_pool.shutdown(wait=False)
+        self.save_executor.shutdown(wait=False)
@@ -0,0 +1,228 @@
+"""Analytic capacity estimates: the smallest QR version a payload fits in.
+
+qrcode finds the version by writing the whole payload into a bit buffer and
+bisecting the capacity table, and a payload that fits nowhere only fails
+with an obscure error from deep inside the encoder. The bits a
+segment needs follow directly from its mode and length, so they are counted
+here without building anything:
+
+    payload = "HTTPS://EXAMPLE.COM/12345678901234567890"
+    fit_version(segments(payload), ERROR_CORRECTION_MAP["H"])   # -> 3
+    describe(fit_versions(payload), "M")                        # -> "Fits in v2 at M"
+    version, chunks = plan(payload, "M", "optimal")             # what to encode
+
+The default "greedy" segmentation is the one QRCode.add_data() uses, so the
+estimate is exactly the version qrcode would pick. "optimal" segmentation
+instead finds the split into numeric, alphanumeric and byte segments that
+needs the fewest bits, which shrinks payloads like URLs with long numeric
+IDs that qrcode leaves in byte mode. qrcode has no Kanji mode; Japanese
+text is measured as the UTF-8 bytes it is encoded as. Importing this module only
+pulls in qrcode, not numpy or the rest of the engine.
+"""
+from bisect import bisect_left
+from functools import lru_cache
+
+from qrcode import constants, util
+
+# Error correction levels
+ERROR_CORRECTION_MAP = {
+    "L": constants.ERROR_CORRECT_L,  # 7% error correction
+    "M": constants.ERROR_CORRECT_M,  # 15% error correction
+    "Q": constants.ERROR_CORRECT_Q,  # 25% error correction
+    "H": constants.ERROR_CORRECT_H   # 30% error correction
+}
+
+# Versions sharing the same character count field widths
+VERSION_BANDS = ((1, 9), (10, 26), (27, 40))
+
+# QRCode.add_data()'s default: shorter runs aren't worth a mode switch
+OPTIMIZE_MINIMUM = 20
+
+SEGMENTATIONS = ("greedy", "optimal")
+
+# Optimal splits remembered per (payload, band). The GUI's capacity count,
+# the encode and the verification of one payload then share a single run.
+OPTIMAL_CACHE_SIZE = 32
+
+# States of the optimal segmenter: the mode of the segment in progress and
+# where its last character falls in a group of 2 alphanumerics or 3 digits.
+# Each is (mode, state after one more character, bits that character adds),
+# so groups are costed exactly (4, 7 then 10 bits for 1-3 digits).
+_BYTE, _ALPHA_1, _ALPHA_2, _DIGIT_1, _DIGIT_2, _DIGIT_3 = range(6)
+_STATES = (
+    (util.MODE_8BIT_BYTE, _BYTE, 8),
+    (util.MODE_ALPHA_NUM, _ALPHA_2, 5),
+    (util.MODE_ALPHA_NUM, _ALPHA_1, 6),
+    (util.MODE_NUMBER, _DIGIT_2, 3),
+    (util.MODE_NUMBER, _DIGIT_3, 3),
+    (util.MODE_NUMBER, _DIGIT_1, 4),
+)
+# State and bits of the first character of a new segment
+_STARTS = {
+    util.MODE_8BIT_BYTE: (_BYTE, 8),
+    util.MODE_ALPHA_NUM: (_ALPHA_1, 6),
+    util.MODE_NUMBER: (_DIGIT_1, 4),
+}
+# Modes each byte value can be encoded in
+_BYTE_MODES = [
+    (util.MODE_NUMBER, util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE) if value in b"0123456789"
+    else (util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE) if value in util.ALPHA_NUM
+    else (util.MODE_8BIT_BYTE,)
+    for value in range(256)
+]
+
+
+class DataTooLarge(ValueError):
+    """Raised when a payload doesn't fit in any version at the requested level"""
+
+
+def segments(data, minimum=OPTIMIZE_MINIMUM):
+    """The mode segments QRCode.add_data(data) would make, as qrcode QRData chunks"""
+    return list(util.optimal_data_chunks(data, minimum=minimum))
+
+
+def optimal_segments(data, version):
+    """The split of data into QRData chunks that needs the fewest bits in version
+
+    Only the version's band matters, through the width of the character
+    count fields. Works on the UTF-8 bytes, so multi-byte characters always
+    land in byte mode. Results are cached, as the search is pure Python and
+    takes tens of milliseconds on long payloads.
+    """
+    band_first = next(first for first, last in VERSION_BANDS if version <= last)
+    return list(_optimal_chunks(util.to_bytestring(data), band_first))
+
+
+@lru_cache(maxsize=OPTIMAL_CACHE_SIZE)
+def _optimal_chunks(data, version):
+    headers = {mode: 4 + util.length_in_bits(mode, version) for mode in _STARTS}
+    infinity = float("inf")
+    cost = [infinity] * len(_STATES)
+    parents = []
+    for index, value in enumerate(data):
+        modes = _BYTE_MODES[value]
+        new_cost = [infinity] * len(_STATES)
+        parent = [None] * len(_STATES)
+        # Extend the segment in progress
+        for state, (mode, following, bits) in enumerate(_STATES):
+            if mode in modes and cost[state] + bits < new_cost[following]:
+                new_cost[following] = cost[state] + bits
+                parent[following] = state
+        # Or start a new one after the cheapest state of another mode
+        if index:
+            cheapest = {}
+            for state, (mode, _, _) in enumerate(_STATES):
+                if cost[state] < cheapest.get(mode, (infinity,))[0]:
+                    cheapest[mode] = (cost[state], state)
+        for mode in modes:
+            start, bits = _STARTS[mode]
+            if index:
+                before, previous = min(
+                    (entry for other, entry in cheapest.items() if other != mode), default=(infinity, None)
+                )
+            else:
+                before, previous = 0, None
+            if before + headers[mode] + bits < new_cost[start]:
+                new_cost[start] = before + headers[mode] + bits
+                parent[start] = previous
+        cost = new_cost
+        parents.append(parent)
+
+    # Walk back from the cheapest final state; segments change mode at every boundary
+    chunks = []
+    state = min(range(len(_STATES)), key=cost.__getitem__) if data else None
+    end = len(data)
+    for index in range(len(data) - 1, -1, -1):
+        previous = parents[index][state]
+        if previous is None or _STATES[previous][0] != _STATES[state][0]:
+            chunks.append(util.QRData(data[index:end], mode=_STATES[state][0], check_data=False))
+            end = index
+        state = previous
+    chunks.reverse()
+    return tuple(chunks)
+
+
+def clear_cache():
+    """Forget the remembered optimal splits, e.g. to time the search itself"""
+    _optimal_chunks.cache_clear()
+
+
+def segment_bits(chunk, version):
+    """Bits chunk takes up in version: mode indicator, character count and data"""
+    length = len(chunk)
+    if chunk.mode == util.MODE_NUMBER:
+        # 10 bits per 3 digits, 4 or 7 for the rest
+        data = length // 3 * 10 + util.NUMBER_LENGTH.get(length % 3, 0)
+    elif chunk.mode == util.MODE_ALPHA_NUM:
+        # 11 bits per pair, 6 for an odd one out
+        data = length // 2 * 11 + length % 2 * 6
+    else:
+        data = length * 8
+    return 4 + util.length_in_bits(chunk.mode, version) + data
+
+
+def data_bits(chunks, version):
+    """Bits the whole payload needs in version"""
+    return sum(segment_bits(chunk, version) for chunk in chunks)
+
+
+def _band_chunks(data, segmentation):
+    # Greedy chunks are the same in every band, optimal ones are worked out
+    # per band and only for the bands actually tried
+    if segmentation == "greedy":
+        chunks = segments(data)
+        return lambda first: chunks
+    if segmentation != "optimal":
+        raise ValueError(f"Segmentation must be one of {', '.join(SEGMENTATIONS)} (got {segmentation!r})")
+    computed = {}
+
+    def chunks_for(first):
+        if first not in computed:
+            computed[first] = optimal_segments(data, first)
+        return computed[first]
+    return chunks_for
+
+
+def _fit(chunks_for, error_correction):
+    limits = util.BIT_LIMIT_TABLE[error_correction]
+    chunks = None
+    for first, last in VERSION_BANDS:
+        chunks = chunks_for(first)
+        version = bisect_left(limits, data_bits(chunks, first), first, last + 1)
+        if version <= last:
+            return version, chunks
+    return None, chunks
+
+
+def fit_version(chunks, error_correction):
+    """Smallest version chunks fit in at a qrcode error correction constant, or None"""
+    return _fit(lambda first: chunks, error_correction)[0]
+
+
+def plan(data, error_level, segmentation="greedy"):
+    """(version, chunks) to encode data with at an error level name
+
+    version is the smallest one the data fits in, or None if it fits in none.
+    """
+    return _fit(_band_chunks(data, segmentation), ERROR_CORRECTION_MAP[error_level])
+
+
+def fit_versions(data, segmentation="greedy"):
+    """Smallest version per error level name, None where the payload doesn't fit"""
+    chunks_for = _band_chunks(data, segmentation)
+    return {level: _fit(chunks_for, correction)[0] for level, correction in ERROR_CORRECTION_MAP.items()}
+
+
+def describe(versions, level):
+    """One line about level's fit for the UI, e.g. "Fits in v12 at M, too big for H" """
+    version = versions[level]
+    if version is not None:
+        too_big = [name for name, fitted in versions.items() if fitted is None]
+        text = f"Fits in v{version} at {level}"
+        return f"{text}, too big for {', '.join(too_big)}" if too_big else text
+    fitting = [name for name, fitted in versions.items() if fitted is not None]
+    if not fitting:
+        return "Too big for any QR code"
+    # Levels run L to H, so the last one that fits protects the most
+    best = fitting[-1]
+    return f"Too big for {level}, fits in v{versions[best]} at {best}"
@@ -0,0 +1,21 @@
+"""Settings shared by the GUI and the engine.
+
+Kept free of heavy imports (qrcode, numpy, PIL) so the GUI can build its
+window from these before the engine is loaded.
+"""
+import os
+
+# Where generated codes are saved unless told otherwise
+DEFAULT_OUTPUT_FOLDER = os.path.join(os.path.expanduser("~"), "QRCodes")
+
+# Error correction levels, lowest to highest
+ERROR_LEVELS = ["L", "M", "Q", "H"]
+
+# Fill colors offered by the UI
+COLOR_OPTIONS = {
+    "Black": "#000000",
+    "Navy Blue": "#000080",
+    "Dark Green": "#006400",
+    "Dark Red": "#8B0000",
+    "Purple": "#800080"
+}
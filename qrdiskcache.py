@@ -0,0 +1,265 @@
+"""Content-addressed on-disk cache of exported files, shared between processes.
+
+Exports are keyed by a hash of everything that decides the file's bytes
+(payload, error level, segmentation, mask, size, border, colours, DPI and
+format), so exporting the same code again is a file copy instead of an
+encode and render:
+
+    cache = DiskCache(default_cache_dir(output_folder))
+    cached_export(cache, options, "code.png", matrix=matrix)
+
+Entries are written to a temporary file and renamed into place, so no
+process ever sees a partial file. The total size is capped: when an entry
+pushes it over, the least recently used entries (by modification time,
+which every hit refreshes) are deleted. A lock file in the cache
+directory is held shared while an entry is copied out and exclusively
+while entries are renamed in or evicted, so the GUI and any number of
+batch workers can use the same directory.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import qrmetrics
+from qrengine import encode_matrix, resolve_color
+from qrexport import export_format, export_matrix, write_matrix
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f, shared):
+        # Windows has no shared locks, readers take turns too
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f, shared):
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+CACHE_DIRNAME = ".qrcache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Part of every key; bump it when an exporter's output changes so that
+# entries written by older code stop matching
+CACHE_FORMAT = 1
+
+# Eviction frees space down to this fraction of the cap, so it doesn't run
+# again on the very next write
+EVICT_TO = 0.9
+
+LOCK_NAME = ".lock"
+# Running total of the entry sizes, kept so writes don't rescan the directory
+SIZE_NAME = ".size"
+TEMP_PREFIX = ".tmp-"
+# Temporary files older than this were left behind by a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+
+def default_cache_dir(output_folder):
+    """The cache directory inside an output folder"""
+    return os.path.join(output_folder, CACHE_DIRNAME)
+
+
+def render_key(options, fmt):
+    """Cache key of the file options export to in fmt: a hash plus the extension"""
+    parts = (
+        CACHE_FORMAT, options.encode_key(), options.box_size, options.border,
+        resolve_color(options.fill_color), resolve_color(options.back_color),
+        options.target_size, options.print_size_mm, options.dpi, fmt,
+    )
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest() + "." + fmt
+
+
+class DiskCache:
+    """A directory of exported files addressed by render_key(), capped at max_bytes"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        # Two-character subfolders keep directories small
+        return os.path.join(self.directory, key[:2], key)
+
+    @contextmanager
+    def _locked(self, shared=False):
+        # A fresh open file per use, so threads of one process exclude each
+        # other as well as other processes
+        with open(os.path.join(self.directory, LOCK_NAME), "a+b") as f:
+            _lock_file(f, shared)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def export(self, key, dest, link=False):
+        """Copy the entry for key to dest and return True, or False if there is none
+
+        With link=True dest becomes a hard link where the file system allows
+        it. Only use that when nothing edits exported files in place, as the
+        cached entry would change with them.
+        """
+        if self._copy(key, dest, link):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def _copy(self, key, dest, link):
+        source = self.path(key)
+        with self._locked(shared=True):
+            if not os.path.exists(source):
+                return False
+            linked = False
+            if link:
+                try:
+                    if os.path.lexists(dest):
+                        os.remove(dest)
+                    os.link(source, dest)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                shutil.copyfile(source, dest)
+            # Hits count as uses for LRU eviction
+            os.utime(source)
+        return True
+
+    def put(self, key, write):
+        """Store the file write(out) produces under key, evicting old entries if needed
+
+        Returns False without storing anything if the file alone is over the cap.
+        """
+        path = self.path(key)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=folder, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                write(out)
+                size = out.tell()
+            if size > self.max_bytes:
+                os.remove(temp)
+                return False
+            with self._locked():
+                total = self._read_size()
+                if os.path.exists(path):
+                    total -= os.path.getsize(path)
+                os.replace(temp, path)
+                total += size
+                if total > self.max_bytes:
+                    total = self._evict()
+                self._write_size(total)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        return True
+
+    def _read_size(self):
+        try:
+            with open(os.path.join(self.directory, SIZE_NAME)) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            # Missing or damaged: count from scratch
+            return self._scan()[1]
+
+    def _write_size(self, total):
+        with open(os.path.join(self.directory, SIZE_NAME), "w") as f:
+            f.write(str(total))
+
+    def _scan(self):
+        """(entries as (mtime, size, path), total size); removes stale temp files"""
+        entries = []
+        total = 0
+        now = time.time()
+        for folder in os.scandir(self.directory):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                try:
+                    stat = entry.stat()
+                    if entry.name.startswith(TEMP_PREFIX):
+                        if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                            os.remove(entry.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict(self):
+        # Caller holds the exclusive lock. The scan also corrects the running
+        # total if files were deleted by hand.
+        entries, total = self._scan()
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            os.remove(path)
+            total -= size
+            self.evictions += 1
+        return total
+
+    def clear(self):
+        """Delete every entry"""
+        with self._locked():
+            for _, _, path in self._scan()[0]:
+                os.remove(path)
+            self._write_size(0)
+
+    def stats(self):
+        """Counters for monitoring the hit rate, like LRUCache.stats()"""
+        lookups = self.hits + self.misses
+        with self._locked(shared=True):
+            entries, total = self._scan()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": total,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cached_export(cache, options, path, fmt=None, matrix=None, link=False):
+    """Export options' code to path, copying an earlier identical export from cache if there is one
+
+    matrix, if given, must be encode_matrix(options); otherwise the code is
+    only encoded on a miss. cache may be None to always export. Returns
+    True on a cache hit.
+    """
+    fmt = fmt or export_format(path)
+    if cache is not None:
+        key = render_key(options, fmt)
+        with qrmetrics.stage("disk_cache") as record:
+            record["cached"] = cache.export(key, path, link)
+        if record["cached"]:
+            return True
+    if matrix is None:
+        matrix = encode_matrix(options)
+    if cache is None:
+        export_matrix(matrix, path, options, fmt)
+        return False
+    stored = cache.put(key, lambda out: write_matrix(matrix, out, options, fmt))
+    if not (stored and cache._copy(key, path, link)):
+        # Too big to cache, or evicted by another process in between
+        export_matrix(matrix, path, options, fmt)
+    return False
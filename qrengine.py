@@ -0,0 +1,350 @@
+"""Headless QR rendering engine.
+
+Turns a payload into a QR code image without touching any GUI toolkit, so
+the same code runs in the Tk app, batch workers and servers. Importing this
+module must never pull in tkinter or customtkinter.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import qrcode
+from PIL import Image, ImageColor
+
+import qrmetrics
+from qrcapacity import ERROR_CORRECTION_MAP, SEGMENTATIONS, DataTooLarge, describe, fit_versions, plan
+from qrdefaults import COLOR_OPTIONS, DEFAULT_OUTPUT_FOLDER  # noqa: F401 (re-exported)
+from qrmask import best_mask_pattern
+from qrmatrix import QRMatrix
+
+# Hard limits on output size, checked before anything is allocated. Streamed
+# exports only hold one row at a time, but in-memory images cost about
+# RASTER_BYTES_PER_PIXEL for every pixel while being built (one palette
+# index per pixel, plus the row-scaled copy it is expanded from).
+MAX_OUTPUT_SIDE = 20000
+MAX_RASTER_BYTES = 256 * 1024 * 1024
+RASTER_BYTES_PER_PIXEL = 2
+
+
+class OutputTooLarge(ValueError):
+    """Raised when a requested image would exceed the size or memory budget"""
+
+
+def check_output_size(side, in_memory=False):
+    """Raise OutputTooLarge if a side x side image is over budget"""
+    if side > MAX_OUTPUT_SIDE:
+        raise OutputTooLarge(
+            f"Output would be {side} px wide, the limit is {MAX_OUTPUT_SIDE} px. Choose a smaller size."
+        )
+    if in_memory and side * side * RASTER_BYTES_PER_PIXEL > MAX_RASTER_BYTES:
+        megabytes = side * side * RASTER_BYTES_PER_PIXEL // (1024 * 1024)
+        raise OutputTooLarge(
+            f"A {side} px image needs about {megabytes} MB in memory, the limit is "
+            f"{MAX_RASTER_BYTES // (1024 * 1024)} MB. Export it to a file instead."
+        )
+
+
+@dataclass(frozen=True)
+class QROptions:
+    """Everything needed to render one QR code"""
+    data: str
+    error_level: str = "M"
+    box_size: int = 10
+    border: int = 4
+    fill_color: str = "#000000"
+    back_color: str = "white"
+    # 0-7 pins the mask pattern and skips mask selection, None picks the best one
+    mask_pattern: Optional[int] = None
+    # Target output mode: the final image side in pixels, or a physical print
+    # size at a DPI. Either one replaces box_size, which is then worked out
+    # from the version the data needs.
+    target_size: Optional[int] = None
+    print_size_mm: Optional[float] = None
+    dpi: Optional[int] = None
+    # "greedy" splits the payload into modes exactly like qrcode, "optimal"
+    # finds the split needing the fewest bits, which can mean a smaller version
+    segmentation: str = "greedy"
+
+    def validate(self):
+        """Raise ValueError if the options can't be rendered"""
+        if not self.data:
+            raise ValueError("QR code data must not be empty")
+        if self.error_level not in ERROR_CORRECTION_MAP:
+            raise ValueError(f"Unknown error correction level: {self.error_level!r}")
+        if self.box_size < 1:
+            raise ValueError(f"Box size must be at least 1 (got {self.box_size})")
+        if self.border < 0:
+            raise ValueError(f"Border must not be negative (got {self.border})")
+        if self.mask_pattern is not None and self.mask_pattern not in range(8):
+            raise ValueError(f"Mask pattern must be between 0 and 7 (got {self.mask_pattern})")
+        if self.target_size is not None and self.target_size < 1:
+            raise ValueError(f"Target size must be at least 1 px (got {self.target_size})")
+        if (self.print_size_mm is None) != (self.dpi is None) and self.target_size is None:
+            raise ValueError("Print size and DPI must be given together")
+        if self.print_size_mm is not None and self.print_size_mm <= 0:
+            raise ValueError(f"Print size must be positive (got {self.print_size_mm})")
+        if self.dpi is not None and self.dpi < 1:
+            raise ValueError(f"DPI must be at least 1 (got {self.dpi})")
+        if self.segmentation not in SEGMENTATIONS:
+            raise ValueError(f"Unknown segmentation: {self.segmentation!r}")
+
+    def target_pixels(self):
+        """Requested output side in pixels, or None when box_size applies"""
+        if self.target_size is not None:
+            return self.target_size
+        if self.print_size_mm is not None and self.dpi is not None:
+            return int(round(self.print_size_mm / 25.4 * self.dpi))
+        return None
+
+    def output_box_size(self, modules):
+        """Pixels per module for a modules x modules matrix, within the size budget
+
+        In target mode this is the largest box size whose image (border
+        included) still fits the target.
+        """
+        total = modules + 2 * self.border
+        target = self.target_pixels()
+        if target is None:
+            box_size = self.box_size
+        else:
+            box_size = target // total
+            if box_size < 1:
+                raise ValueError(
+                    f"{target} px is too small for this code: it needs at least {total} px "
+                    f"({modules} modules plus border)"
+                )
+        check_output_size(total * box_size)
+        return box_size
+
+    def encode_key(self):
+        """The fields that affect the module matrix; size, border and colors don't"""
+        return (self.data, self.error_level, self.mask_pattern, self.segmentation)
+
+
+def _nbytes(value):
+    # NumPy arrays and QRMatrix report their size, PIL images and encoded files don't
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, bytes):
+        return len(value)
+    return value.nbytes
+
+
+class LRUCache:
+    """Thread-safe LRU cache for matrices, rendered images and encoded files
+
+    Bounded both by entry count and by the total bytes held, so a few huge
+    version 40 codes can't push out everything else unnoticed.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(key, value):
+        return _nbytes(value) + sum(len(str(part)) for part in key)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entry_size(key, self._entries.pop(key))
+            self._entries[key] = value
+            self.current_bytes += size
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self.current_bytes -= self._entry_size(old_key, old_value)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring the hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared by everything in this process that encodes through encode_matrix
+matrix_cache = LRUCache()
+
+# Display-size previews, shared by everything that calls preview_image
+preview_cache = LRUCache(max_entries=64, max_bytes=24 * 1024 * 1024)
+
+
+def resolve_color(color):
+    """Map a UI color name (e.g. "Navy Blue") to its hex value, pass anything else through"""
+    return COLOR_OPTIONS.get(color, color)
+
+
+def build_qr(options):
+    """Encode the payload and return the compiled qrcode.QRCode"""
+    options.validate()
+    # Counted rather than searched for, so make() below never has to fit
+    version, chunks = plan(options.data, options.error_level, options.segmentation)
+    if version is None:
+        raise DataTooLarge(describe(fit_versions(options.data, options.segmentation), options.error_level))
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=ERROR_CORRECTION_MAP[options.error_level],
+        box_size=options.box_size,
+        border=options.border,
+        mask_pattern=options.mask_pattern,
+    )
+    for chunk in chunks:
+        qr.add_data(chunk)
+    if options.mask_pattern is None:
+        # Same choice qrcode would make, without its eight trial layouts
+        with qrmetrics.stage("mask"):
+            qr.mask_pattern = best_mask_pattern(qr)
+    qr.make(fit=False)
+    return qr
+
+
+def encode_matrix(options, cache=matrix_cache):
+    """Encode the payload and return its module matrix as a QRMatrix (no border)
+
+    Results are cached by options.encode_key(), so changing only the size,
+    border or colors skips encoding; pass cache=None to always encode.
+    """
+    with qrmetrics.stage("encode") as record:
+        key = options.encode_key()
+        if cache is not None:
+            matrix = cache.get(key)
+            if matrix is not None:
+                record["cached"] = True
+                return matrix
+        qr = build_qr(options)
+        matrix = QRMatrix.from_array(qr.modules)
+        record["modules"] = matrix.size
+        if cache is not None:
+            cache.put(key, matrix)
+        return matrix
+
+
+def _to_image(pixels, fill_color, back_color):
+    # pixels holds 0 (background) / 1 (module) per pixel, so it maps
+    # directly onto a two entry palette and the image shares its memory.
+    # Any fill colour works without expanding to RGB, and PIL saves a two
+    # entry palette as a 1 bit PNG.
+    height, width = pixels.shape
+    image = Image.frombuffer("P", (width, height), pixels, "raw", "P", 0, 1)
+    image.putpalette(
+        ImageColor.getrgb(resolve_color(back_color))[:3] + ImageColor.getrgb(resolve_color(fill_color))[:3]
+    )
+    return image
+
+
+def _record_image(record, image):
+    record["width"], record["height"] = image.size
+    record["bytes"] = _nbytes(image)
+
+
+def _rasterize(matrix, box_size, border, fill_color, back_color):
+    padded = np.pad(np.asarray(matrix), border).astype(np.uint8)
+    pixels = np.repeat(np.repeat(padded, box_size, axis=0), box_size, axis=1)
+    return _to_image(pixels, fill_color, back_color)
+
+
+def rasterize(matrix, box_size, border=4, fill_color="#000000", back_color="white"):
+    """Scale a module matrix up to box_size pixels per module (nearest neighbour)
+
+    Returns a two colour palette ("P") image. Raises OutputTooLarge before
+    allocating if the image is over budget.
+    """
+    check_output_size((matrix.shape[0] + 2 * border) * box_size, in_memory=True)
+    with qrmetrics.stage("rasterize") as record:
+        image = _rasterize(matrix, box_size, border, fill_color, back_color)
+        _record_image(record, image)
+        return image
+
+
+def rasterize_to_size(matrix, size, border=4, fill_color="#000000", back_color="white"):
+    """Draw a module matrix straight at size x size pixels (nearest neighbour)
+
+    Cost only depends on the target size, never on the export box size.
+    """
+    padded = np.pad(np.asarray(matrix), border).astype(np.uint8)
+    index = np.arange(size) * padded.shape[0] // size
+    pixels = np.ascontiguousarray(padded[np.ix_(index, index)])
+    return _to_image(pixels, fill_color, back_color)
+
+
+def rasterize_preview(matrix, size, border=4, fill_color="#000000", back_color="white"):
+    """Draw a module matrix for display in a size x size area
+
+    Uses the largest whole number of pixels per module that fits, so every
+    module keeps the same hard-edged size. Codes too dense for at least two
+    pixels per module are stretched to the full area with rasterize_to_size
+    instead of being shown tiny.
+    """
+    box_size = size // (matrix.shape[0] + 2 * border)
+    if box_size < 2:
+        return rasterize_to_size(matrix, size, border, fill_color, back_color)
+    return _rasterize(matrix, box_size, border, fill_color, back_color)
+
+
+def preview_image(matrix, options, size, cache=preview_cache):
+    """Cached rasterize_preview of matrix in options' border and colors
+
+    Keyed by everything that changes the pixels, the matrix itself included,
+    so redisplaying the same code at the same size (e.g. after a theme
+    toggle or a resize back) never redraws it.
+    """
+    key = (
+        matrix, options.border, resolve_color(options.fill_color),
+        resolve_color(options.back_color), size
+    )
+    with qrmetrics.stage("preview") as record:
+        image = cache.get(key) if cache is not None else None
+        if image is not None:
+            record["cached"] = True
+        else:
+            image = rasterize_preview(matrix, size, options.border, options.fill_color, options.back_color)
+            if cache is not None:
+                cache.put(key, image)
+        _record_image(record, image)
+        return image
+
+
+def render_image(options):
+    """Render the QR code described by options to a PIL image at full output size"""
+    matrix = encode_matrix(options)
+    box_size = options.output_box_size(matrix.shape[0])
+    return rasterize(matrix, box_size, options.border, options.fill_color, options.back_color)
+
+
+def render_preview(options, size):
+    """Render the QR code described by options to fit a size x size display area"""
+    return preview_image(encode_matrix(options), options, size)
@@ -0,0 +1,226 @@
+"""Streaming export of module matrices to PNG, SVG and PDF.
+
+Nothing here builds the full bitmap. PNG output is produced one scanline
+at a time through zlib, and the vector formats merge each row's runs of
+dark modules into rectangles, so peak memory is proportional to the image
+width rather than its area no matter how large the print size.
+"""
+import io
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import ImageColor
+
+import qrmetrics
+from qrengine import encode_matrix, resolve_color
+
+EXPORT_FORMATS = {
+    ".png": "png",
+    ".svg": "svg",
+    ".pdf": "pdf",
+}
+
+# Compressed PNG data is written out in IDAT chunks of about this size
+PNG_CHUNK_SIZE = 64 * 1024
+
+# zlib level for PNG data. Level 9 makes files about 15% smaller but takes
+# over three times as long on scaled-up modules (see benchmarks/bench_png.py).
+PNG_COMPRESS_LEVEL = 6
+
+
+def _rgb(color):
+    return ImageColor.getrgb(resolve_color(color))[:3]
+
+
+def _dark_runs(row):
+    """(start, length) of every run of dark modules in a matrix row"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], row.astype(np.int8), [0]))))
+    starts = edges[::2]
+    return zip(starts.tolist(), (edges[1::2] - starts).tolist())
+
+
+def _png_chunk(out, chunk_type, data):
+    out.write(struct.pack(">I", len(data)))
+    out.write(chunk_type)
+    out.write(data)
+    out.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF))
+
+
+def write_png(matrix, out, box_size, border=4, fill_color="#000000", back_color="white", dpi=None):
+    """Write a 1 bit palette PNG of matrix to a binary file object, row by row"""
+    padded = np.pad(np.asarray(matrix), border)
+    width = padded.shape[1] * box_size
+
+    out.write(b"\x89PNG\r\n\x1a\n")
+    # Bit depth 1, color type 3 (palette): index 0 is the background, 1 a module
+    _png_chunk(out, b"IHDR", struct.pack(">IIBBBBB", width, width, 1, 3, 0, 0, 0))
+    _png_chunk(out, b"PLTE", bytes(_rgb(back_color) + _rgb(fill_color)))
+    if dpi:
+        # Physical resolution in pixels per meter, so it prints at the intended size
+        pixels_per_meter = int(round(dpi / 0.0254))
+        _png_chunk(out, b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+
+    compressor = zlib.compressobj(PNG_COMPRESS_LEVEL)
+    pending = []
+    pending_size = 0
+    # Every module row repeats box_size times. The first scanline of a row
+    # is stored unfiltered, which compresses better than its difference
+    # from the row above, and the repeats use the Up filter so they are all
+    # zeros. Each module row goes to zlib in one call.
+    repeats = (b"\x02" + bytes((width + 7) // 8)) * (box_size - 1)
+    for module_row in padded:
+        scanline = np.packbits(np.repeat(module_row, box_size))
+        data = compressor.compress(b"\x00" + scanline.tobytes() + repeats)
+        if data:
+            pending.append(data)
+            pending_size += len(data)
+        if pending_size >= PNG_CHUNK_SIZE:
+            _png_chunk(out, b"IDAT", b"".join(pending))
+            pending = []
+            pending_size = 0
+    pending.append(compressor.flush())
+    _png_chunk(out, b"IDAT", b"".join(pending))
+    _png_chunk(out, b"IEND", b"")
+
+
+def write_svg(matrix, out, box_size, border=4, fill_color="#000000", back_color="white", dpi=None):
+    """Write matrix as an SVG with one path of merged module runs to a binary file object
+
+    With a dpi the document size is given in millimetres instead of pixels.
+    """
+    modules = matrix.shape[0] + 2 * border
+    size = modules * box_size
+    if dpi:
+        size = f"{size / dpi * 25.4:.3f}mm"
+    out.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {modules} {modules}" shape-rendering="crispEdges">\n'
+        f'<rect width="{modules}" height="{modules}" fill="{resolve_color(back_color)}"/>\n'
+        f'<path fill="{resolve_color(fill_color)}" d="'.encode("utf-8")
+    )
+    for y, row in enumerate(matrix, border):
+        parts = [f"M{x + border} {y}h{length}v1h-{length}z" for x, length in _dark_runs(row)]
+        if parts:
+            out.write("".join(parts).encode("ascii"))
+    out.write(b'"/>\n</svg>\n')
+
+
+class _CountingWriter:
+    # PDF cross references need the byte offset of every object
+    def __init__(self, out):
+        self.out = out
+        self.offset = 0
+
+    def write(self, data):
+        self.out.write(data)
+        self.offset += len(data)
+
+
+def write_pdf(matrix, out, box_size, border=4, fill_color="#000000", back_color="white", dpi=None):
+    """Write matrix as a single page vector PDF to a binary file object
+
+    One module is box_size points (1/72 in) wide, or box_size pixels at dpi
+    when a dpi is given. Each row's dark runs become one rectangle, and the
+    page content is deflated as it is written.
+    """
+    modules = matrix.shape[0] + 2 * border
+    if dpi:
+        box_size = round(box_size * 72 / dpi, 4)
+    size = round(modules * box_size, 4)
+    writer = _CountingWriter(out)
+    offsets = {}
+
+    def begin(number):
+        offsets[number] = writer.offset
+        writer.write(f"{number} 0 obj\n".encode("ascii"))
+
+    writer.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    begin(1)
+    writer.write(b"<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+    begin(2)
+    writer.write(b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n")
+    begin(3)
+    writer.write(
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {size} {size}] /Contents 4 0 R >>\nendobj\n".encode("ascii")
+    )
+
+    # Content stream: its length goes in object 5 once it is known
+    begin(4)
+    writer.write(b"<< /Length 5 0 R /Filter /FlateDecode >>\nstream\n")
+    compressor = zlib.compressobj(9)
+    stream_length = 0
+
+    def emit(text):
+        nonlocal stream_length
+        data = compressor.compress(text.encode("ascii"))
+        stream_length += len(data)
+        writer.write(data)
+
+    back = " ".join(f"{c / 255:.4g}" for c in _rgb(back_color))
+    fill = " ".join(f"{c / 255:.4g}" for c in _rgb(fill_color))
+    # Work in module units with the origin at the top left, like the matrix
+    emit(f"{back} rg 0 0 {size} {size} re f\n{box_size} 0 0 {-box_size} 0 {size} cm\n{fill} rg\n")
+    for y, row in enumerate(matrix, border):
+        rects = [f"{x + border} {y} {length} 1 re" for x, length in _dark_runs(row)]
+        if rects:
+            emit(" ".join(rects) + "\n")
+    emit("f\n")
+    data = compressor.flush()
+    stream_length += len(data)
+    writer.write(data)
+    writer.write(b"\nendstream\nendobj\n")
+    begin(5)
+    writer.write(f"{stream_length}\nendobj\n".encode("ascii"))
+
+    xref = writer.offset
+    writer.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for number in sorted(offsets):
+        writer.write(f"{offsets[number]:010d} 00000 n \n".encode("ascii"))
+    writer.write(
+        f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    )
+
+
+WRITERS = {
+    "png": write_png,
+    "svg": write_svg,
+    "pdf": write_pdf,
+}
+
+
+def export_format(path):
+    """Export format for a file name, PNG unless the extension says otherwise"""
+    return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), "png")
+
+
+def write_matrix(matrix, out, options, fmt="png"):
+    """Write matrix in the given format to a binary file object using options' size and colors
+
+    Raises OutputTooLarge before writing anything if the size is over budget.
+    """
+    box_size = options.output_box_size(matrix.shape[0])
+    WRITERS[fmt](
+        matrix, out, box_size, options.border, options.fill_color, options.back_color, options.dpi
+    )
+
+
+def render_bytes(options, fmt="png"):
+    """Encode options and return the file in the given format as bytes (safe to run on a pool worker)"""
+    out = io.BytesIO()
+    write_matrix(encode_matrix(options), out, options, fmt)
+    return out.getvalue()
+
+
+def export_matrix(matrix, path, options, fmt=None):
+    """Export matrix to path, picking the format from the extension unless fmt is given"""
+    fmt = fmt or export_format(path)
+    # Fails before the file is opened, so an oversized code never truncates what is there
+    options.output_box_size(matrix.shape[0])
+    with qrmetrics.stage("write") as record:
+        with open(path, "wb") as out:
+            write_matrix(matrix, out, options, fmt)
+            record["format"] = fmt
+            record["bytes"] = out.tell()
@@ -1,15 +1,117 @@
-import qrcode
-from PIL import Image, ImageTk
+import time
+_module_start = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+# The engine (qrcode, numpy, PIL) is imported on first generation, not here
+from qrdefaults import COLOR_OPTIONS, DEFAULT_OUTPUT_FOLDER, ERROR_LEVELS
+import qrmetrics
+from qrtheme import ThemeRegistry
+from qrtoast import ToastManager
+
+_import_seconds = time.perf_counter() - _module_start
 
 # Basic appearance settings
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
+# How often the UI checks on a background render (ms)
+RENDER_POLL_MS = 30
+
+# Live preview waits this long after the last edit before rendering (ms)
+LIVE_PREVIEW_DELAY_MS = 50
+
+# Set to 1 (or a log file path) to record per-stage timings
+METRICS_ENV_VAR = "QRGEN_METRICS"
+
+# Set to 1 to print startup timings as JSON and exit once the window is ready
+STARTUP_PROBE_ENV_VAR = "QRGEN_STARTUP_PROBE"
+
+# Set to 1 to cache saved codes in .qrcache in the output folder, or to a
+# directory to cache them there (off by default)
+RENDER_CACHE_ENV_VAR = "QRGEN_RENDER_CACHE"
+
+# Set to 0 to stop decoding each generated code back to check that it scans
+VERIFY_ENV_VAR = "QRGEN_VERIFY"
+
+# Whether the Compact Encoding switch (optimal mode segmentation) starts on;
+# it can shrink the version of mixed content such as URLs with long IDs
+COMPACT_ENCODING_DEFAULT = True
+
+# Palette roles, each one is colors[f"{role}_{theme}"]
+THEME_ROLES = ["text", "text_secondary", "bg", "card", "border"]
+
+# Which palette role each themed widget option follows
+THEMED_WIDGETS = {
+    "main_frame": {"fg_color": "bg"},
+    "header": {"fg_color": "bg"},
+    "title_label": {"text_color": "text"},
+    "content_frame": {"fg_color": "bg"},
+    "footer": {"fg_color": "card"},
+    "left_panel": {"fg_color": "card"},
+    "input_label": {"text_color": "text"},
+    "input_sublabel": {"text_color": "text"},
+    "data_input": {"border_color": "border", "fg_color": "bg"},
+    "qr_card": {"fg_color": "bg", "border_color": "border"},
+    "settings_label": {"text_color": "text"},
+    "size_label": {"text_color": "text"},
+    "size_value_label": {"text_color": "text"},
+    "error_label": {"text_color": "text"},
+    "capacity_label": {"text_color": "text_secondary"},
+    "fill_label": {"text_color": "text"},
+    "live_label": {"text_color": "text"},
+    "compact_label": {"text_color": "text"},
+    "export_label": {"text_color": "text"},
+    "right_panel": {"fg_color": "card"},
+    "qr_label": {"text_color": "text"},
+    "status_label": {"text_color": "text"},
+    "creator_label": {"text_color": "text_secondary"}
+}
+
+class RenderJob:
+    """A QR render running off the Tk thread"""
+    def __init__(self, options, display_size, quiet=False):
+        self.options = options
+        self.display_size = display_size
+        self.quiet = quiet
+        self.stage = "Queued"
+        self.cancelled = False
+        self.future = None
+        # fit_versions() for the payload, counted here rather than on the Tk thread
+        self.versions = None
+        self.trace = qrmetrics.Trace("preview" if quiet else "generate")
+    
+    def run(self):
+        # Runs on the worker thread - must not touch any widget
+        if self.cancelled:
+            return None
+        from qrcapacity import fit_versions
+        from qrengine import encode_matrix, preview_image
+        with qrmetrics.trace(self.trace):
+            self.stage = "Counting"
+            # Optimal splits are cached, so encoding reuses this count's work
+            self.versions = fit_versions(self.options.data, self.options.segmentation)
+            if self.cancelled:
+                return None
+            self.stage = "Encoding"
+            matrix = encode_matrix(self.options)
+            if self.cancelled:
+                return None
+            self.stage = "Drawing"
+            # Drawn at display size from the matrix, reused if this exact preview was shown before
+            display_img = preview_image(matrix, self.options, self.display_size)
+        return matrix, display_img
+    
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
 class ModernQRGenerator:
     def __init__(self, root):
         self.root = root
@@ -66,6 +168,7 @@ class ModernQRGenerator:
         self.header.grid_propagate(False)
         self.header.grid_columnconfigure(0, weight=1)
         self.header.grid_columnconfigure(1, weight=0)
+        self.header.grid_columnconfigure(2, weight=0)
         
         self.title_label = ctk.CTkLabel(
             self.header, 
@@ -75,9 +178,22 @@ class ModernQRGenerator:
         )
         self.title_label.grid(row=0, column=0, padx=(30, 0), pady=(15, 15), sticky="w")
         
+        # Single code / batch switcher
+        self.mode_var = tk.StringVar(value="Single")
+        self.mode_switch = ctk.CTkSegmentedButton(
+            self.header,
+            values=["Single", "Batch"],
+            variable=self.mode_var,
+            command=self.show_mode,
+            font=self.fonts["body"],
+            selected_color=self.colors["accent"],
+            selected_hover_color=self.colors["accent_hover"]
+        )
+        self.mode_switch.grid(row=0, column=1, padx=(0, 20), pady=(15, 15), sticky="e")
+        
         # Enhanced theme switcher
         self.theme_container = ctk.CTkFrame(self.header, fg_color="transparent")
-        self.theme_container.grid(row=0, column=1, padx=(0, 30), pady=(15, 15), sticky="e")
+        self.theme_container.grid(row=0, column=2, padx=(0, 30), pady=(15, 15), sticky="e")
         
         # Theme icons
         self.light_icon = ctk.CTkLabel(
@@ -117,6 +233,71 @@ class ModernQRGenerator:
         self.content_frame.grid_columnconfigure(1, weight=4)
         self.content_frame.grid_rowconfigure(0, weight=1)
         
+        # Footer bar
+        self.footer = ctk.CTkFrame(self.main_frame, corner_radius=0, fg_color=self.colors["card_light"], height=40)
+        self.footer.grid(row=2, column=0, sticky="ew")
+        self.footer.grid_propagate(False)
+        self.footer.grid_columnconfigure(0, weight=1)
+        self.footer.grid_columnconfigure(1, weight=0)
+        
+        self.status_label = ctk.CTkLabel(
+            self.footer, 
+            text="Ready", 
+            font=self.fonts["small"],
+            text_color=self.colors["text_light"]
+        )
+        self.status_label.grid(row=0, column=0, padx=30, pady=(0, 0), sticky="w")
+        
+        # Add "Created by Shend" label in the bottom right corner
+        self.creator_label = ctk.CTkLabel(
+            self.footer,
+            text="Created by Shend",
+            font=self.fonts["tiny"],
+            text_color=self.colors["text_secondary_light"]
+        )
+        self.creator_label.grid(row=0, column=1, padx=(0, 30), pady=(0, 0), sticky="e")
+        
+        # Initialization
+        # The module matrix is the canonical result, images are drawn from it on demand
+        self.qr_matrix = None
+        self.qr_options = None
+        self.display_img = None
+        self.tk_image = None
+        
+        # Generation runs on a single background thread, newer requests replace older ones
+        self.render_executor = ThreadPoolExecutor(max_workers=1)
+        self.render_job = None
+        # Codes are decoded back on their own thread, so checking one never holds up the next render
+        self.verify_executor = ThreadPoolExecutor(max_workers=1)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Batch tab, built the first time it is opened
+        self.batch_view = None
+        
+        # Saved codes go here; the folder is only created on first save
+        self.output_folder = DEFAULT_OUTPUT_FOLDER
+        # Exports can be cached inside it, see disk_cache()
+        self.render_cache = None
+        
+        # Paint the window shell first, then fill in the panels
+        self.root.update()
+        self.first_paint_time = time.perf_counter()
+        self.build_panels()
+        
+        # Widgets register their colour roles once, a theme switch only touches what changes
+        self.theme = ThemeRegistry({
+            theme: {role: self.colors[f"{role}_{theme}"] for role in THEME_ROLES}
+            for theme in ("light", "dark")
+        })
+        for name, roles in THEMED_WIDGETS.items():
+            self.theme.register(getattr(self, name), **roles)
+        self.theme.listen(self.update_placeholder_color)
+        
+        # Toast widgets are pooled and only created when first needed
+        self.toasts = ToastManager(self)
+    
+    def build_panels(self):
+        """Build the input, settings and preview panels inside the content area"""
         # Left panel - Input and settings
         self.left_panel = ctk.CTkFrame(self.content_frame, corner_radius=15, fg_color=self.colors["card_light"])
         self.left_panel.grid(row=0, column=0, padx=(30, 15), pady=30, sticky="nsew")
@@ -250,7 +431,7 @@ class ModernQRGenerator:
         self.error_var = tk.StringVar(value="M")
         self.error_menu = ctk.CTkOptionMenu(
             self.error_container,
-            values=["L", "M", "Q", "H"],
+            values=ERROR_LEVELS,
             variable=self.error_var,
             font=self.fonts["body"],
             dropdown_font=self.fonts["body"],
@@ -260,6 +441,15 @@ class ModernQRGenerator:
         )
         self.error_menu.grid(row=0, column=1, padx=(10, 0), sticky="e")
         
+        # Which version the input fits in, counted on every edit
+        self.capacity_label = ctk.CTkLabel(
+            self.error_container, 
+            text="", 
+            font=self.fonts["small"],
+            text_color=self.colors["text_secondary_light"]
+        )
+        self.capacity_label.grid(row=1, column=0, columnspan=2, sticky="w")
+        
         # Color
         self.color_container = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
         self.color_container.grid(row=3, column=0, pady=(0, 15), sticky="ew")
@@ -273,13 +463,7 @@ class ModernQRGenerator:
         )
         self.fill_label.grid(row=0, column=0, sticky="w")
         
-        self.color_options = {
-            "Black": "#000000", 
-            "Navy Blue": "#000080", 
-            "Dark Green": "#006400", 
-            "Dark Red": "#8B0000", 
-            "Purple": "#800080"
-        }
+        self.color_options = dict(COLOR_OPTIONS)
         
         self.fill_var = tk.StringVar(value="Black")
         self.fill_menu = ctk.CTkOptionMenu(
@@ -294,6 +478,104 @@ class ModernQRGenerator:
         )
         self.fill_menu.grid(row=0, column=1, padx=(10, 0), sticky="e")
         
+        # Live preview
+        self.live_container = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
+        self.live_container.grid(row=4, column=0, pady=(0, 15), sticky="ew")
+        self.live_container.grid_columnconfigure(1, weight=1)
+        
+        self.live_label = ctk.CTkLabel(
+            self.live_container, 
+            text="Live Preview:", 
+            font=self.fonts["body"],
+            text_color=self.colors["text_light"]
+        )
+        self.live_label.grid(row=0, column=0, sticky="w")
+        
+        self.live_preview_var = tk.BooleanVar(value=True)
+        self.live_switch = ctk.CTkSwitch(
+            self.live_container,
+            text="",
+            variable=self.live_preview_var,
+            onvalue=True,
+            offvalue=False,
+            command=self.schedule_preview,
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"],
+            progress_color=self.colors["accent"]
+        )
+        self.live_switch.grid(row=0, column=1, padx=(10, 0), sticky="e")
+        
+        # Export size: the slider's box size, or a fixed output size
+        self.export_container = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
+        self.export_container.grid(row=5, column=0, pady=(0, 15), sticky="ew")
+        self.export_container.grid_columnconfigure(1, weight=1)
+        
+        self.export_label = ctk.CTkLabel(
+            self.export_container, 
+            text="Export Size:", 
+            font=self.fonts["body"],
+            text_color=self.colors["text_light"]
+        )
+        self.export_label.grid(row=0, column=0, sticky="w")
+        
+        self.export_size_options = {
+            "Slider": {},
+            "1024 px": {"target_size": 1024},
+            "2048 px": {"target_size": 2048},
+            "4096 px": {"target_size": 4096},
+            "30 mm @ 300 DPI": {"print_size_mm": 30, "dpi": 300},
+            "50 mm @ 300 DPI": {"print_size_mm": 50, "dpi": 300},
+            "100 mm @ 600 DPI": {"print_size_mm": 100, "dpi": 600}
+        }
+        
+        self.export_size_var = tk.StringVar(value="Slider")
+        self.export_menu = ctk.CTkOptionMenu(
+            self.export_container,
+            values=list(self.export_size_options.keys()),
+            variable=self.export_size_var,
+            command=self.update_export_size,
+            font=self.fonts["body"],
+            dropdown_font=self.fonts["body"],
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"],
+            dropdown_hover_color=self.colors["accent_hover"]
+        )
+        self.export_menu.grid(row=0, column=1, padx=(10, 0), sticky="e")
+        
+        # Compact encoding: optimal mode segmentation instead of qrcode's own
+        self.compact_container = ctk.CTkFrame(self.settings_frame, fg_color="transparent")
+        self.compact_container.grid(row=6, column=0, pady=(0, 15), sticky="ew")
+        self.compact_container.grid_columnconfigure(1, weight=1)
+        
+        self.compact_label = ctk.CTkLabel(
+            self.compact_container, 
+            text="Compact Encoding:", 
+            font=self.fonts["body"],
+            text_color=self.colors["text_light"]
+        )
+        self.compact_label.grid(row=0, column=0, sticky="w")
+        
+        self.compact_var = tk.BooleanVar(value=COMPACT_ENCODING_DEFAULT)
+        self.compact_switch = ctk.CTkSwitch(
+            self.compact_container,
+            text="",
+            variable=self.compact_var,
+            onvalue=True,
+            offvalue=False,
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"],
+            progress_color=self.colors["accent"]
+        )
+        self.compact_switch.grid(row=0, column=1, padx=(10, 0), sticky="e")
+        
+        # Any edit re-renders the preview once input settles
+        self.preview_delay_ms = LIVE_PREVIEW_DELAY_MS
+        self.preview_after_id = None
+        self.data_input.bind("<KeyRelease>", lambda event: self.schedule_preview())
+        self.error_var.trace_add("write", lambda *args: self.schedule_preview())
+        self.fill_var.trace_add("write", lambda *args: self.schedule_preview())
+        self.compact_var.trace_add("write", lambda *args: self.schedule_preview())
+        
         # Buttons
         self.button_frame = ctk.CTkFrame(self.left_panel, fg_color="transparent")
         self.button_frame.grid(row=4, column=0, padx=20, pady=(20, 20), sticky="ew")
@@ -405,41 +687,46 @@ class ModernQRGenerator:
         )
         self.qr_display.grid(row=0, column=0, padx=40, pady=40, sticky="nsew")
         
-        # Footer bar
-        self.footer = ctk.CTkFrame(self.main_frame, corner_radius=0, fg_color=self.colors["card_light"], height=40)
-        self.footer.grid(row=2, column=0, sticky="ew")
-        self.footer.grid_propagate(False)
-        self.footer.grid_columnconfigure(0, weight=1)
-        self.footer.grid_columnconfigure(1, weight=0)
-        
-        self.status_label = ctk.CTkLabel(
-            self.footer, 
-            text="Ready", 
-            font=self.fonts["small"],
-            text_color=self.colors["text_light"]
-        )
-        self.status_label.grid(row=0, column=0, padx=30, pady=(0, 0), sticky="w")
-        
-        # Add "Created by Shend" label in the bottom right corner
-        self.creator_label = ctk.CTkLabel(
-            self.footer,
-            text="Created by Shend",
-            font=self.fonts["tiny"],
-            text_color=self.colors["text_secondary_light"]
-        )
-        self.creator_label.grid(row=0, column=1, padx=(0, 30), pady=(0, 0), sticky="e")
-        
-        # Initialization
-        self.qr_image = None
-        self.tk_image = None
-        
-        # Create output folder
-        self.output_folder = os.path.join(os.path.expanduser("~"), "QRCodes")
-        if not os.path.exists(self.output_folder):
-            os.makedirs(self.output_folder)
+        # Redraw the preview when its area changes size
+        self.resize_after_id = None
+        self.qr_display_frame.bind("<Configure>", self.on_preview_resize)
     
     def update_size_display(self, value):
         self.size_value_label.configure(text=f"{int(value)}")
+        self.schedule_preview()
+    
+    def update_export_size(self, choice):
+        # A fixed export size replaces the slider's box size
+        self.size_slider.configure(state="normal" if choice == "Slider" else "disabled")
+        self.schedule_preview()
+    
+    def schedule_preview(self):
+        """Debounce live preview: restart the timer on every edit so bursts render once"""
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+            self.preview_after_id = None
+        # Without live preview the timer still refreshes the capacity count
+        self.preview_after_id = self.root.after(self.preview_delay_ms, self.live_preview)
+    
+    def live_preview(self):
+        self.preview_after_id = None
+        if self.live_preview_var.get():
+            # The render counts the capacity too, exactly and off the Tk thread
+            self.generate_qr(quiet=True)
+        else:
+            self.update_capacity()
+    
+    def show_mode(self, mode):
+        if mode == "Batch":
+            if self.batch_view is None:
+                from qrbatchview import BatchView
+                self.batch_view = BatchView(self, self.main_frame)
+            self.content_frame.grid_remove()
+            self.batch_view.show(row=1, column=0)
+        else:
+            if self.batch_view is not None:
+                self.batch_view.hide()
+            self.content_frame.grid()
     
     def toggle_theme(self):
         if self.theme_switch.get() == "dark":
@@ -452,155 +739,208 @@ class ModernQRGenerator:
             self.update_colors_for_theme("light")
     
     def update_colors_for_theme(self, theme):
-        # Color variables
-        text_color = self.colors["text_dark"] if theme == "dark" else self.colors["text_light"]
-        text_secondary = self.colors["text_secondary_dark"] if theme == "dark" else self.colors["text_secondary_light"]
-        bg_color = self.colors["bg_dark"] if theme == "dark" else self.colors["bg_light"]
-        card_color = self.colors["card_dark"] if theme == "dark" else self.colors["card_light"]
-        border_color = self.colors["border_dark"] if theme == "dark" else self.colors["border_light"]
-        
-        # Color updates after theme change
-        if theme == "dark":
-            # Main components
-            self.main_frame.configure(fg_color=bg_color)
-            self.header.configure(fg_color=bg_color)
-            self.title_label.configure(text_color=text_color)
-            self.content_frame.configure(fg_color=bg_color)
-            self.footer.configure(fg_color=card_color)
-            
-            # Left panel
-            self.left_panel.configure(fg_color=card_color)
-            self.input_label.configure(text_color=text_color)
-            self.input_sublabel.configure(text_color=text_color)
-            self.data_input.configure(border_color=border_color, fg_color=bg_color)
-            
-            # QR Card
-            self.qr_card.configure(fg_color=bg_color, border_color=border_color)
-            
-            # Settings
-            self.settings_label.configure(text_color=text_color)
-            self.size_label.configure(text_color=text_color)
-            self.size_value_label.configure(text_color=text_color)
-            self.error_label.configure(text_color=text_color)
-            self.fill_label.configure(text_color=text_color)
-            
-            # Right panel
-            self.right_panel.configure(fg_color=card_color)
-            self.qr_label.configure(text_color=text_color)
-            
-            # Status
-            self.status_label.configure(text_color=text_color)
-            self.creator_label.configure(text_color=text_secondary)
-            
-            # Placeholder
-            if self.data_input.get("0.0", "end-1c").strip() == "Write your QR code content here...":
-                self.data_input.configure(text_color=text_secondary)
-        else:
-            # Main components
-            self.main_frame.configure(fg_color=bg_color)
-            self.header.configure(fg_color=bg_color)
-            self.title_label.configure(text_color=text_color)
-            self.content_frame.configure(fg_color=bg_color)
-            self.footer.configure(fg_color=card_color)
-            
-            # Left panel
-            self.left_panel.configure(fg_color=card_color)
-            self.input_label.configure(text_color=text_color)
-            self.input_sublabel.configure(text_color=text_color)
-            self.data_input.configure(border_color=border_color, fg_color=bg_color)
-            
-            # QR Card
-            self.qr_card.configure(fg_color=bg_color, border_color=border_color)
-            
-            # Settings
-            self.settings_label.configure(text_color=text_color) 
-            self.size_label.configure(text_color=text_color)
-            self.size_value_label.configure(text_color=text_color)
-            self.error_label.configure(text_color=text_color)
-            self.fill_label.configure(text_color=text_color)
-            
-            # Right panel
-            self.right_panel.configure(fg_color=card_color)
-            self.qr_label.configure(text_color=text_color)
-            
-            # Status
-            self.status_label.configure(text_color=text_color)
-            self.creator_label.configure(text_color=text_secondary)
-            
-            # Placeholder
-            if self.data_input.get("0.0", "end-1c").strip() == "Write your QR code content here...":
-                self.data_input.configure(text_color=text_secondary)
+        # One pass, at most one configure per widget; the preview image is left alone
+        self.theme.apply(theme)
+    
+    def update_placeholder_color(self, theme):
+        if self.data_input.get("0.0", "end-1c").strip() == "Write your QR code content here...":
+            self.data_input.configure(text_color=theme.color("text_secondary"))
         
-    def generate_qr(self):
+    def generate_qr(self, quiet=False):
         data = self.data_input.get("0.0", "end-1c").strip()
         
         # Placeholder check
         if data == "Write your QR code content here...":
             data = ""
         
+        if not data and quiet:
+            # Live preview of empty input just clears the preview
+            self.cancel_render()
+            self.reset_preview()
+            self.update_capacity(data)
+            return
+        
         if not data:
             # Custom error notification
             self.show_notification("Please enter text or URL to convert to QR code.", "error")
             return
         
-        size = int(self.size_slider.get())
-        error_level = self.error_var.get()
-        fill_color = self.color_options[self.fill_var.get()]
-        
-        # Error correction level
-        error_correction_map = {
-            "L": qrcode.constants.ERROR_CORRECT_L,  # 7% error correction
-            "M": qrcode.constants.ERROR_CORRECT_M,  # 15% error correction
-            "Q": qrcode.constants.ERROR_CORRECT_Q,  # 25% error correction
-            "H": qrcode.constants.ERROR_CORRECT_H   # 30% error correction
-        }
+        options = self.current_options(data)
+        
+        # Capacity is counted, not encoded, so oversized input is refused at
+        # once. The quick count is qrcode's own split; compact encoding can
+        # only need fewer bits, so a payload too big for it goes to the render
+        # thread, which raises DataTooLarge if it doesn't fit either.
+        versions = self.update_capacity(data)
+        if versions[options.error_level] is None and options.segmentation == "greedy":
+            from qrcapacity import describe
+            message = describe(versions, options.error_level)
+            self.cancel_render()
+            if quiet:
+                self.status_label.configure(text=f"❌ {message}")
+            else:
+                self.show_notification(message, "error")
+            return
+        
+        display_size = self.preview_size()
+        
+        # A newer request makes any render still in flight stale
+        self.cancel_render()
+        self.render_job = RenderJob(options, display_size, quiet)
+        self.render_job.future = self.render_executor.submit(self.render_job.run)
         
         # Status update
         self.status_label.configure(text="⏳ Generating QR code...")
-        self.root.update()
-        
-        # Loading effect for button
-        original_text = self.generate_button._text_label.cget("text")
         self.generate_button._text_label.configure(text="⌛ Processing...")
-        self.generate_button.configure(state="disabled")
-        self.root.update()
+        self.root.after(RENDER_POLL_MS, self.poll_render, self.render_job)
+    
+    def update_capacity(self, data=None):
+        """Show the smallest version the input fits in; returns fit_versions() or None without input
+
+        Uses qrcode's own split, which takes well under a millisecond even
+        for a full code. With compact encoding the real version can be
+        smaller; renders replace this with their exact count.
+        """
+        from qrcapacity import fit_versions
+        if data is None:
+            data = self.data_input.get("0.0", "end-1c").strip()
+            if data == "Write your QR code content here...":
+                data = ""
+        if not data:
+            self.capacity_label.configure(text="")
+            return None
+        versions = fit_versions(data)
+        self.show_capacity(versions, exact=not self.compact_var.get())
+        return versions
+    
+    def show_capacity(self, versions, exact=True):
+        from qrcapacity import describe
+        level = self.error_var.get()
+        icon = "📐" if versions[level] is not None else "⚠️"
+        text = f"{icon} {describe(versions, level)}"
+        self.capacity_label.configure(text=text if exact else f"{text} (before compacting)")
+    
+    def segmentation(self):
+        """Mode segmentation for the Compact Encoding setting"""
+        return "optimal" if self.compact_var.get() else "greedy"
+    
+    def current_options(self, data):
+        """QROptions for data using the current settings"""
+        from qrengine import QROptions
+        size = int(self.size_slider.get())
+        return QROptions(
+            data=data,
+            error_level=self.error_var.get(),
+            box_size=size * 10,  # Size increase for better visibility
+            fill_color=self.color_options[self.fill_var.get()],
+            back_color="white",
+            segmentation=self.segmentation(),
+            **self.export_size_options[self.export_size_var.get()]
+        )
+    
+    def poll_render(self, job):
+        """Pick up a background render's result on the Tk thread"""
+        # Superseded or cancelled - drop the result
+        if job is not self.render_job:
+            return
+        
+        if not job.future.done():
+            # Show which stage the worker is in
+            self.generate_button._text_label.configure(text=f"⌛ {job.stage}...")
+            self.root.after(RENDER_POLL_MS, self.poll_render, job)
+            return
+        
+        self.render_job = None
+        self.generate_button._text_label.configure(text="✨ Generate")
+        if job.versions is not None:
+            self.show_capacity(job.versions)
         
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=error_correction_map[error_level],
-                box_size=size * 10,  # Size increase for better visibility
-                border=4,
-            )
-            
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            self.qr_image = qr.make_image(fill_color=fill_color, back_color="white")
-            
-            # Resize for display
-            display_size = min(self.qr_display_frame.winfo_width(), self.qr_display_frame.winfo_height()) - 80
-            if display_size < 100:  # If widget hasn't been drawn yet
-                display_size = 300
-                
-            display_img = self.qr_image.copy()
-            display_img = display_img.resize((display_size, display_size), Image.LANCZOS)
-            
-            self.tk_image = ImageTk.PhotoImage(display_img)
-            self.qr_display.configure(image=self.tk_image, text="")
+            self.qr_matrix, display_img = job.future.result()
+            self.qr_options = job.options
+            with qrmetrics.stage("photoimage", trace=job.trace):
+                self.show_preview(display_img)
             
             # Activate save button
             self.save_button.configure(state="normal")
             
-            # Success notification
-            self.show_notification("QR code successfully generated!", "success")
+            # Success notification (live previews only update the status bar)
+            if job.quiet:
+                self.status_label.configure(text="✅ Preview updated")
+            else:
+                self.show_notification("QR code successfully generated!", "success")
+            self.show_metrics(job.trace)
+            self.verify_current()
             
         except Exception as e:
-            self.show_notification(f"QR code generation failed: {str(e)}", "error")
-        
-        # Restore button state
-        self.generate_button._text_label.configure(text=original_text)
-        self.generate_button.configure(state="normal")
+            if job.quiet:
+                self.status_label.configure(text=f"❌ {str(e)}")
+            else:
+                self.show_notification(f"QR code generation failed: {str(e)}", "error")
+    
+    def verify_current(self):
+        """Decode the code just shown back in the background and warn if it won't scan"""
+        if os.environ.get(VERIFY_ENV_VAR) == "0":
+            return
+        from qrverify import verify_matrix
+        future = self.verify_executor.submit(verify_matrix, self.qr_matrix, self.qr_options)
+        self.root.after(RENDER_POLL_MS, self.poll_verification, future, self.qr_matrix)
+    
+    def poll_verification(self, future, matrix):
+        # A newer code has replaced this one - its own check will report
+        if matrix is not self.qr_matrix:
+            return
+        if not future.done():
+            self.root.after(RENDER_POLL_MS, self.poll_verification, future, matrix)
+            return
+        try:
+            problem = future.result()
+        except Exception as e:
+            problem = f"couldn't be checked: {e}"
+        if problem:
+            self.show_notification(f"This code may not scan: {problem}", "warning")
+    
+    def preview_size(self):
+        """Pixel size available for the preview image"""
+        display_size = min(self.qr_display_frame.winfo_width(), self.qr_display_frame.winfo_height()) - 80
+        if display_size < 100:  # If widget hasn't been drawn yet
+            display_size = 300
+        return display_size
+    
+    def show_preview(self, display_img):
+        # Previews come from a cache, so an unchanged one keeps its PhotoImage
+        if display_img is not self.display_img:
+            from PIL import ImageTk
+            self.display_img = display_img
+            self.tk_image = ImageTk.PhotoImage(display_img)
+        self.qr_display.configure(image=self.tk_image, text="")
+    
+    def on_preview_resize(self, event):
+        if self.qr_matrix is None:
+            return
+        if self.resize_after_id is not None:
+            self.root.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.root.after(100, self.refresh_preview)
+    
+    def refresh_preview(self):
+        """Redraw the current code for the preview area's new size"""
+        self.resize_after_id = None
+        if self.qr_matrix is None or self.render_job is not None:
+            return
+        # Preview sizes are cheap to draw and cached, so this stays on the Tk thread
+        from qrengine import preview_image
+        self.show_preview(preview_image(self.qr_matrix, self.qr_options, self.preview_size()))
+    
+    def show_metrics(self, trace):
+        """Append a trace's stage timings to the status bar when metrics are on"""
+        if qrmetrics.is_enabled() and trace.records:
+            self.status_label.configure(text=f"{self.status_label.cget('text')}  ·  {trace.summary()}")
+    
+    def cancel_render(self):
+        if self.render_job is not None:
+            self.render_job.cancel()
+            self.render_job = None
+            self.generate_button._text_label.configure(text="✨ Generate")
     
     def show_notification(self, message, type="info"):
         """Show custom visual notification"""
@@ -613,42 +953,11 @@ class ModernQRGenerator:
         # Update status bar
         self.status_label.configure(text=f"{icon} {message}")
         
-        # Get window size
-        window_width = self.root.winfo_width()
-        notification_width = min(400, window_width - 60)
-        
-        # Also create toast-like modern notification with width set in constructor
-        notification = ctk.CTkFrame(
-            self.main_frame, 
-            corner_radius=10,
-            border_width=1,
-            border_color=color,
-            fg_color=self.colors["bg_light"] if self.current_theme == "light" else self.colors["bg_dark"],
-            width=notification_width
-        )
-        
-        # Notification content
-        ctk.CTkLabel(
-            notification,
-            text=icon,
-            font=ctk.CTkFont(size=20)
-        ).grid(row=0, column=0, padx=(15, 5), pady=15)
-        
-        ctk.CTkLabel(
-            notification,
-            text=message,
-            font=self.fonts["body"],
-            text_color=self.colors["text_light"] if self.current_theme == "light" else self.colors["text_dark"]
-        ).grid(row=0, column=1, padx=(0, 15), pady=15, sticky="w")
-        
-        # Position notification (bottom right corner)
-        notification.place(x=window_width - notification_width - 30, y=self.root.winfo_height() - 100)
-        
-        # Remove notification after 3 seconds
-        self.root.after(3000, lambda: notification.destroy())
+        # Toast, reusing a pooled widget and merging repeats of a message already shown
+        self.toasts.notify(message, icon, color)
     
     def save_qr(self):
-        if self.qr_image is None:
+        if self.qr_matrix is None:
             self.show_notification("Create a QR code first.", "error")
             return
         
@@ -657,10 +966,10 @@ class ModernQRGenerator:
         default_filename = f"QRCode_{timestamp}.png"
         
         file_path = filedialog.asksaveasfilename(
-            initialdir=self.output_folder,
+            initialdir=self.ensure_output_folder(),
             initialfile=default_filename,
             defaultextension=".png",
-            filetypes=[("PNG files", "*.png"), ("All files", "*.*")]
+            filetypes=[("PNG files", "*.png"), ("SVG files", "*.svg"), ("PDF files", "*.pdf"), ("All files", "*.*")]
         )
         
         if file_path:
@@ -671,7 +980,11 @@ class ModernQRGenerator:
                 self.save_button.configure(state="disabled")
                 self.root.update()
                 
-                self.qr_image.save(file_path)
+                # Streamed straight from the matrix, format picked by the extension,
+                # or copied from the render cache if this exact file was saved before
+                from qrdiskcache import cached_export
+                with qrmetrics.trace("save") as trace:
+                    cached_export(self.disk_cache(), self.qr_options, file_path, matrix=self.qr_matrix)
                 
                 # Restore button state
                 self.save_button._text_label.configure(text=original_text)
@@ -679,6 +992,7 @@ class ModernQRGenerator:
                 
                 # Success notification
                 self.show_notification(f"QR code saved: {os.path.basename(file_path)}", "success")
+                self.show_metrics(trace)
                 
                 # Option to open folder
                 if messagebox.askyesno("Success", f"QR code saved to:\n{file_path}\n\nDo you want to open the containing folder?"):
@@ -689,6 +1003,8 @@ class ModernQRGenerator:
                 self.show_notification(f"Failed to save QR code: {str(e)}", "error")
     
     def clear_input(self):
+        self.cancel_render()
+        
         # Loading effect for button
         original_text = self.clear_button._text_label.cget("text")
         self.clear_button._text_label.configure(text="⌛ Clearing...")
@@ -704,11 +1020,16 @@ class ModernQRGenerator:
         self.update_size_display(5)
         self.error_var.set("M")
         self.fill_var.set("Black")
+        self.export_size_var.set("Slider")
+        self.update_export_size("Slider")
+        self.compact_var.set(COMPACT_ENCODING_DEFAULT)
         
-        # Clear QR image
-        self.qr_display.configure(image="", text="Your QR code will be displayed here")
-        self.qr_image = None
-        self.save_button.configure(state="disabled")
+        # Clear QR image (and drop the previews the resets above just queued)
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+            self.preview_after_id = None
+        self.reset_preview()
+        self.update_capacity("")
         
         # Restore button state
         self.clear_button._text_label.configure(text=original_text)
@@ -717,6 +1038,31 @@ class ModernQRGenerator:
         # Success notification
         self.show_notification("All information cleared", "info")
     
+    def reset_preview(self):
+        self.qr_display.configure(image="", text="Your QR code will be displayed here")
+        self.qr_matrix = None
+        self.qr_options = None
+        self.display_img = None
+        self.tk_image = None
+        self.save_button.configure(state="disabled")
+    
+    def ensure_output_folder(self):
+        """Create the output folder on first use and return it"""
+        os.makedirs(self.output_folder, exist_ok=True)
+        return self.output_folder
+    
+    def disk_cache(self):
+        """The render cache shared with other sessions and batch runs, or None unless turned on"""
+        # Opt-in, since it keeps up to 256 MB of copies next to the saved codes
+        location = os.environ.get(RENDER_CACHE_ENV_VAR)
+        if not location or location == "0":
+            return None
+        if self.render_cache is None:
+            from qrdiskcache import DiskCache, default_cache_dir
+            cache_dir = default_cache_dir(self.ensure_output_folder()) if location == "1" else location
+            self.render_cache = DiskCache(cache_dir)
+        return self.render_cache
+    
     def open_folder(self, path):
         """Open folder in file explorer"""
         if os.name == 'nt':  # Windows
@@ -724,11 +1070,40 @@ class ModernQRGenerator:
         elif os.name == 'posix':  # macOS and Linux
             import subprocess
             subprocess.call(['open' if os.sys.platform == 'darwin' else 'xdg-open', path])
+    
+    def on_close(self):
+        self.cancel_render()
+        self.render_executor.shutdown(wait=False)
+        self.verify_executor.shutdown(wait=False)
+        if self.batch_view is not None:
+            self.batch_view.shutdown()
+        self.root.destroy()
 
 def main():
+    # Opt-in instrumentation: QRGEN_METRICS=1 logs next to the saved codes, any other value is the log path
+    metrics = os.environ.get(METRICS_ENV_VAR)
+    if metrics:
+        log_path = os.path.join(DEFAULT_OUTPUT_FOLDER, "qrgenerator-metrics.jsonl") if metrics == "1" else metrics
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        qrmetrics.enable(log_path)
+    
     root = ctk.CTk()
     app = ModernQRGenerator(root)
+    if os.environ.get(STARTUP_PROBE_ENV_VAR):
+        report_startup(app)
+        return
     root.mainloop()
 
+def report_startup(app):
+    """Print startup timings in ms, counted from the start of this module's imports"""
+    app.root.update()
+    ready = time.perf_counter()
+    print(json.dumps({
+        "import_ms": round(_import_seconds * 1000, 3),
+        "first_paint_ms": round((app.first_paint_time - _module_start) * 1000, 3),
+        "ready_ms": round((ready - _module_start) * 1000, 3)
+    }))
+    app.on_close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""Vectorized QR mask pattern selection.
+
+qrcode's own ``QRCode.best_mask_pattern`` lays out the symbol eight times
+and scores each one with pure Python loops (``qrcode.util.lost_point``).
+This module lays the data out once, derives all eight masked candidates
+with NumPy and scores them in one pass. The penalty rules mirror
+``lost_point`` exactly, so the chosen mask is always the same one qrcode
+would pick.
+"""
+from functools import lru_cache
+
+import numpy as np
+from qrcode import util
+
+# 1:1:3:1:1 finder-like patterns with four light modules on either side,
+# as 11 bit integers read left to right
+_FINDER_PATTERNS = (0b10111010000, 0b00001011101)
+
+
+@lru_cache(maxsize=None)
+def mask_grids(size):
+    """The eight mask patterns for a size x size symbol as an (8, size, size) bool array"""
+    # Same formulas as qrcode.util.mask_func, evaluated for every module at once
+    i, j = np.indices((size, size))
+    return np.array([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    ])
+
+
+@lru_cache(maxsize=None)
+def data_region(version):
+    """Boolean grid of the modules that carry (masked) data for a version"""
+    size = version * 4 + 17
+    region = np.ones((size, size), dtype=bool)
+    # Finder patterns with their separators in three corners
+    region[:8, :8] = False
+    region[:8, size - 8:] = False
+    region[size - 8:, :8] = False
+    # Alignment patterns, except where one would overlap a finder (checked
+    # before the timing patterns go in, as qrcode does)
+    centres = util.pattern_position(version)
+    for row in centres:
+        for column in centres:
+            if region[row, column]:
+                region[row - 2:row + 3, column - 2:column + 3] = False
+    # Timing patterns
+    region[6, :] = False
+    region[:, 6] = False
+    # Format information (and the fixed dark module) around the finders
+    region[8, :9] = False
+    region[:9, 8] = False
+    region[8, size - 8:] = False
+    region[size - 8:, 8] = False
+    # Version information
+    if version >= 7:
+        region[:6, size - 11:size - 8] = False
+        region[size - 11:size - 8, :6] = False
+    return region
+
+
+def _run_penalty(lines):
+    """Rule 1: every run of 5+ same colored modules scores its length - 2, per candidate"""
+    count, rows, width = lines.shape
+    # A sentinel column stops runs from continuing into the next line
+    padded = np.full((count, rows, width + 1), 2, dtype=np.int8)
+    padded[:, :, :width] = lines
+    flat = padded.ravel()
+    ends = np.flatnonzero(flat[1:] != flat[:-1])
+    starts = np.concatenate(([0], ends + 1))
+    ends = np.concatenate((ends, [flat.size - 1]))
+    lengths = ends - starts + 1
+    long_runs = lengths >= 5
+    candidate = starts[long_runs] // (rows * (width + 1))
+    return np.bincount(candidate, weights=lengths[long_runs] - 2, minlength=count).astype(np.int64)
+
+
+def _finder_penalty(lines):
+    """Rule 3: 40 points per finder-like pattern in a row, per candidate"""
+    width = lines.shape[2]
+    windows = width - 10
+    values = np.zeros(lines.shape[:2] + (windows,), dtype=np.int32)
+    for k in range(11):
+        values = (values << 1) | lines[:, :, k:k + windows]
+    hits = (values == _FINDER_PATTERNS[0]) | (values == _FINDER_PATTERNS[1])
+    return hits.sum(axis=(1, 2)) * 40
+
+
+def lost_points(candidates):
+    """Penalty score of each matrix in a (count, size, size) bool array
+
+    Matches qrcode.util.lost_point for every candidate.
+    """
+    candidates = candidates.astype(np.int8)
+    count, size, _ = candidates.shape
+    transposed = candidates.transpose(0, 2, 1)
+
+    score = _run_penalty(candidates) + _run_penalty(np.ascontiguousarray(transposed))
+
+    # Rule 2: 3 points per 2x2 block of one color
+    top_left = candidates[:, :-1, :-1]
+    same = (
+        (top_left == candidates[:, 1:, :-1])
+        & (top_left == candidates[:, :-1, 1:])
+        & (top_left == candidates[:, 1:, 1:])
+    )
+    score += same.sum(axis=(1, 2)) * 3
+
+    score += _finder_penalty(candidates) + _finder_penalty(transposed)
+
+    # Rule 4: 10 points per full 5% the dark ratio is away from 50%,
+    # computed exactly like qrcode so float rounding agrees
+    for index, dark_count in enumerate(candidates.sum(axis=(1, 2))):
+        percent = float(dark_count) / (size ** 2)
+        score[index] += int(abs(percent * 100 - 50) / 5) * 10
+    return score
+
+
+def best_mask_pattern(qr):
+    """Pick the mask qrcode would pick for qr, with one layout instead of eight
+
+    qr must already have its data added. Its version is fitted if not set.
+    """
+    if qr.version is None:
+        qr.best_fit()
+    # Test layout as qrcode scores it: format and version areas left light
+    qr.makeImpl(True, 0)
+    laid_out = np.array(qr.modules, dtype=bool)
+    region = data_region(qr.version)
+    # Both tables only depend on the version, so they are built once and cached
+    masks = mask_grids(qr.modules_count) & region
+    # Undo mask 0 to get the raw data bits, then apply each candidate mask
+    unmasked = laid_out ^ masks[0]
+    candidates = unmasked[np.newaxis] ^ masks
+    # argmin keeps the first of equal scores, like qrcode's strict < comparison
+    return int(np.argmin(lost_points(candidates)))
@@ -0,0 +1,125 @@
+"""Bit-packed, immutable QR module matrices.
+
+qrcode hands back a list of lists of Python bools, over 250 KB for a
+version 40 code, and even a NumPy bool array spends a byte per module.
+QRMatrix keeps one bit per module (under 4 KB at version 40) and is what
+encode_matrix() returns, what the caches hold and what worker processes
+send back:
+
+    matrix = QRMatrix.from_array(np.array(qr.modules, dtype=bool))
+    np.asarray(matrix)                  # read-only bool array, unpacked on demand
+    matrix[row, column], matrix[row]    # one module, or one row as a bool array
+    matrix.data                         # zero-copy memoryview of the packed bits
+    QRMatrix.from_bytes(matrix.to_bytes()) == matrix
+
+Matrices are hashable and compare by content, so they can key caches
+directly. Pickling uses the to_bytes() format.
+"""
+import numpy as np
+
+# Serialized form: MAGIC, FORMAT_VERSION, the side in modules (one byte,
+# version 40 is 177), then the modules row by row, 8 to a byte, MSB first
+MAGIC = b"QRM"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+
+class QRMatrix:
+    """A square module matrix (True = dark, no border), one bit per module"""
+    __slots__ = ("size", "_bits", "_hash")
+
+    def __init__(self, size, bits):
+        """size modules square from packed bits as produced by np.packbits (use from_array normally)"""
+        bits = bytes(bits)
+        if not 0 < size < 256 or len(bits) != (size * size + 7) // 8:
+            raise ValueError(f"{len(bits)} bytes don't hold a {size}x{size} matrix")
+        object.__setattr__(self, "size", size)
+        object.__setattr__(self, "_bits", bits)
+        object.__setattr__(self, "_hash", None)
+
+    @classmethod
+    def from_array(cls, array):
+        """Pack a square 2D array of truth values"""
+        array = np.asarray(array, dtype=bool)
+        if array.ndim != 2 or array.shape[0] != array.shape[1]:
+            raise ValueError(f"a module matrix must be square (got shape {array.shape})")
+        return cls(array.shape[0], np.packbits(array).tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Read the to_bytes() format; raises ValueError if data isn't one"""
+        data = memoryview(data)
+        if len(data) < HEADER_SIZE or data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a serialized module matrix")
+        if data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"unsupported module matrix format {data[len(MAGIC)]}")
+        return cls(data[len(MAGIC) + 1], data[HEADER_SIZE:])
+
+    def to_bytes(self):
+        """Compact binary form: a 5 byte header and the packed bits"""
+        return MAGIC + bytes((FORMAT_VERSION, self.size)) + self._bits
+
+    @property
+    def data(self):
+        """Read-only memoryview of the packed bits, without copying them"""
+        return memoryview(self._bits)
+
+    @property
+    def shape(self):
+        return self.size, self.size
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    def array(self):
+        """The modules as a read-only (size, size) bool array"""
+        bits = np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), count=self.size * self.size)
+        matrix = bits.reshape(self.shape).view(bool)
+        matrix.flags.writeable = False
+        return matrix
+
+    def __array__(self, dtype=None, copy=None):
+        # Lets np.asarray(), np.pad() and friends take a QRMatrix directly
+        matrix = self.array()
+        return matrix if dtype is None else matrix.astype(dtype)
+
+    def __getitem__(self, position):
+        if not (isinstance(position, tuple) and len(position) == 2
+                and all(isinstance(index, (int, np.integer)) for index in position)):
+            # Rows (matrix[row]), slices and the like index the unpacked array
+            return self.array()[position]
+        row, column = position
+        if not (0 <= row < self.size and 0 <= column < self.size):
+            raise IndexError(f"module {position} is outside a {self.size}x{self.size} matrix")
+        index = row * self.size + column
+        return bool(self._bits[index >> 3] >> (7 - (index & 7)) & 1)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        # Rows as bool arrays, like iterating over the unpacked array
+        return iter(self.array())
+
+    def __eq__(self, other):
+        if not isinstance(other, QRMatrix):
+            return NotImplemented
+        return self is other or (self.size == other.size and self._bits == other._bits)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self.size, self._bits)))
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QRMatrix is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("QRMatrix is immutable")
+
+    def __reduce__(self):
+        return QRMatrix.from_bytes, (self.to_bytes(),)
+
+    def __repr__(self):
+        return f"QRMatrix(size={self.size})"
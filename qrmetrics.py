@@ -0,0 +1,139 @@
+"""Opt-in per-stage timing for QR generation and saving.
+
+Code wraps each stage in ``stage()``:
+
+    with qrmetrics.stage("rasterize") as record:
+        image = ...
+        record["width"], record["height"] = image.size
+
+While metrics are disabled (the default) this costs one attribute check.
+Once ``enable()`` is called every finished stage becomes a record that is
+appended as a JSON line to the log file and passed to every registered
+hook, so metrics can be forwarded to any collector:
+
+    qrmetrics.add_hook(lambda record: statsd.timing(record["stage"], record["duration_ms"]))
+
+Stages run inside ``trace()`` are also collected on that trace, which the
+GUI uses for its status bar summary.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_log_file = None
+_log_lock = threading.Lock()
+_hooks = []
+_current = threading.local()
+
+
+def enable(log_path=None):
+    """Start recording stages, appending JSON lines to log_path if given"""
+    global _enabled, _log_file
+    with _log_lock:
+        if _log_file is not None:
+            _log_file.close()
+        _log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+    _enabled = True
+
+
+def disable():
+    global _enabled, _log_file
+    _enabled = False
+    with _log_lock:
+        if _log_file is not None:
+            _log_file.close()
+            _log_file = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def add_hook(hook):
+    """Call hook(record) for every finished stage while metrics are enabled"""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+class Trace:
+    """Stages recorded for one operation, e.g. one generate or one save"""
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.records = []
+
+    def summary(self):
+        """Compact one line summary for the status bar"""
+        parts = []
+        for record in self.records:
+            text = f"{record['stage']} {record['duration_ms']:.1f} ms"
+            if "width" in record:
+                text += f" {record['width']}×{record['height']}"
+            if record.get("cached"):
+                text += " (cached)"
+            parts.append(text)
+        return " · ".join(parts)
+
+
+@contextmanager
+def trace(operation):
+    """Collect the stages run on this thread inside the block on a Trace
+
+    operation is a name for a new Trace, or an existing Trace to add to.
+    """
+    current = operation if isinstance(operation, Trace) else Trace(operation)
+    previous = getattr(_current, "trace", None)
+    _current.trace = current
+    try:
+        yield current
+    finally:
+        _current.trace = previous
+
+
+def _emit(record):
+    if _log_file is not None:
+        line = json.dumps(record)
+        with _log_lock:
+            if _log_file is not None:
+                _log_file.write(line + "\n")
+                _log_file.flush()
+    for hook in list(_hooks):
+        try:
+            hook(record)
+        except Exception as e:
+            # A broken collector must never break generation
+            print(f"qrmetrics hook failed: {e}", file=sys.stderr)
+
+
+@contextmanager
+def stage(name, trace=None):
+    """Time the block as stage name, yielding a dict for extra fields (sizes, cache hits)
+
+    Records go to trace if given, else to the thread's current trace.
+    """
+    record = {}
+    if not _enabled:
+        yield record
+        return
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        duration = time.perf_counter() - start
+        owner = trace or getattr(_current, "trace", None)
+        full = {
+            "ts": time.time(),
+            "operation": owner.operation if owner else None,
+            "stage": name,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        full.update(record)
+        if owner is not None:
+            owner.records.append(full)
+        _emit(full)
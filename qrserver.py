@@ -0,0 +1,249 @@
+"""Local HTTP QR rendering service.
+
+Exposes the same options as the GUI over HTTP using only the standard
+library:
+
+    GET /qr?data=https://example.com&error=M&size=5&color=Navy+Blue&format=svg
+
+``error`` is one of L/M/Q/H, ``size`` the 1-10 slider scale, ``color`` a UI
+color name or hex value and ``format`` png (default), svg or pdf. ``pixels``
+sets an exact output width instead of ``size``, and ``mm`` with ``dpi`` a
+physical print size; outputs over the size budget are refused.
+``segments=optimal`` encodes in the mode split needing the fewest bits,
+which can mean a smaller code. Renders run on a bounded worker pool; when
+it and its queue are full the server answers 503 instead of piling up
+work. Responses carry an ETag and are cached in memory. ``GET /stats``
+reports cache and queue counters.
+
+Usage:
+    python qrserver.py [--host 127.0.0.1] [--port 8080] [--workers N] [--queue N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from qrengine import COLOR_OPTIONS, ERROR_CORRECTION_MAP, LRUCache, QROptions
+from qrexport import render_bytes
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+# Longest payload accepted, well above what a version 40 code can hold
+MAX_DATA_LENGTH = 8192
+
+# Seconds a request waits for its render before giving up
+RENDER_TIMEOUT = 30
+
+
+class ServiceBusy(Exception):
+    """Raised when the render pool and its queue are full"""
+
+
+def options_from_params(params):
+    """Build (QROptions, format) from parsed query parameters, raising ValueError if invalid"""
+    def param(name, default=None):
+        values = params.get(name)
+        return values[0] if values else default
+
+    data = param("data", "")
+    if not data:
+        raise ValueError("missing data")
+    if len(data) > MAX_DATA_LENGTH:
+        raise ValueError(f"data longer than {MAX_DATA_LENGTH} characters")
+    error_level = param("error", "M").upper()
+    if error_level not in ERROR_CORRECTION_MAP:
+        raise ValueError(f"error must be one of {', '.join(ERROR_CORRECTION_MAP)}")
+    try:
+        size = int(param("size", "5"))
+    except ValueError:
+        raise ValueError("size must be a number")
+    if not 1 <= size <= 10:
+        raise ValueError("size must be between 1 and 10")
+    color = param("color", "Black")
+    if color not in COLOR_OPTIONS and not color.startswith("#"):
+        raise ValueError(f"color must be one of {', '.join(COLOR_OPTIONS)} or a #hex value")
+    fmt = param("format", "png").lower()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of {', '.join(CONTENT_TYPES)}")
+    try:
+        pixels = param("pixels")
+        target_size = int(pixels) if pixels else None
+        mm = param("mm")
+        print_size_mm = float(mm) if mm else None
+        dpi = param("dpi")
+        dpi = int(dpi) if dpi else None
+    except ValueError:
+        raise ValueError("pixels, mm and dpi must be numbers")
+
+    options = QROptions(
+        data=data,
+        error_level=error_level,
+        box_size=size * 10,
+        fill_color=color,
+        back_color="white",
+        target_size=target_size,
+        print_size_mm=print_size_mm,
+        dpi=dpi,
+        segmentation=param("segments", "greedy")
+    )
+    options.validate()
+    return options, fmt
+
+
+class QRRenderService:
+    """Bounded render pool with an in-memory response cache"""
+
+    def __init__(self, workers=None, queue_size=32, processes=False,
+                 cache_entries=1024, cache_bytes=64 * 1024 * 1024):
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self.pool = executor(max_workers=workers)
+        # Renders running plus renders waiting; anything beyond is refused
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.cache = LRUCache(max_entries=cache_entries, max_bytes=cache_bytes)
+        self.rejected = 0
+
+    @staticmethod
+    def etag(options, fmt):
+        """Strong ETag derived from everything that determines the output"""
+        key = repr((options, fmt)).encode("utf-8")
+        return '"' + hashlib.sha256(key).hexdigest()[:32] + '"'
+
+    def render(self, options, fmt):
+        """Return (etag, body), from the cache when possible
+
+        Raises ServiceBusy when no render slot is free.
+        """
+        etag = self.etag(options, fmt)
+        body = self.cache.get(etag)
+        if body is not None:
+            return etag, body
+        if not self.slots.acquire(blocking=False):
+            self.rejected += 1
+            raise ServiceBusy()
+        try:
+            future = self.pool.submit(render_bytes, options, fmt)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is held until the render itself ends, not until this
+        # request stops waiting, so timed-out renders still count against the bound
+        future.add_done_callback(lambda _: self.slots.release())
+        body = future.result(timeout=RENDER_TIMEOUT)
+        self.cache.put(etag, body)
+        return etag, body
+
+    def stats(self):
+        return {"cache": self.cache.stats(), "rejected": self.rejected}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+
+class QRRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ModernQRGenerator/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def send_text(self, status, message, headers=None):
+        body = (message + "\n").encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self.send_text(200, json.dumps(self.service.stats()))
+            return
+        if url.path != "/qr":
+            self.send_text(404, "not found")
+            return
+
+        try:
+            options, fmt = options_from_params(parse_qs(url.query))
+        except ValueError as e:
+            self.send_text(400, str(e))
+            return
+
+        # Output is fully determined by the query, so a matching ETag never needs a render
+        etag = self.service.etag(options, fmt)
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        try:
+            etag, body = self.service.render(options, fmt)
+        except ServiceBusy:
+            self.send_text(503, "busy, try again shortly", {"Retry-After": "1"})
+            return
+        except FutureTimeoutError:
+            self.send_text(504, "render timed out")
+            return
+        except ValueError as e:
+            # Bad input, including payloads too big for a code and oversized outputs
+            self.send_text(400, f"QR code generation failed: {e}")
+            return
+        except Exception as e:
+            self.send_text(500, f"internal error: {e}")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[fmt])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=86400, immutable")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QRServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, QRRequestHandler)
+        self.service = service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve QR codes over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="render workers (default: all cores)")
+    parser.add_argument("--queue", type=int, default=32, help="renders allowed to wait before answering 503")
+    parser.add_argument("--processes", action="store_true", help="render in worker processes instead of threads")
+    args = parser.parse_args(argv)
+
+    service = QRRenderService(args.workers, args.queue, args.processes)
+    server = QRServer((args.host, args.port), service)
+    print(f"Serving QR codes on http://{args.host}:{server.server_address[1]}/qr")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Theme registry for the GUI.
+
+Widgets declare once which palette role each of their colour options
+follows; a theme switch then makes a single pass over the registry and
+configures only the options whose colour actually changes:
+
+    theme = ThemeRegistry({"light": {"text": "#37352f"}, "dark": {"text": "#e6e6e6"}})
+    theme.register(label, text_color="text")
+    theme.apply("dark")
+
+Each widget gets at most one configure() call per switch carrying all of
+its changed options, so a CustomTkinter widget redraws once rather than
+once per option. Things that aren't widget options (canvas items,
+placeholder text) subscribe with listen(). Nothing here imports tkinter.
+"""
+
+
+class ThemeRegistry:
+    """Colour roles of every themed widget, applied in one pass per switch
+
+    Widgets are assumed to be built with the default theme's colours.
+    configure_calls counts every configure() made, for benchmarks.
+    """
+
+    def __init__(self, palettes, default="light"):
+        self.palettes = palettes
+        self.default = default
+        self.theme = default
+        self.entries = []
+        self.listeners = []
+        self.configure_calls = 0
+
+    def color(self, role, theme=None):
+        """The colour of role in theme (default: the current theme)"""
+        return self.palettes[theme or self.theme][role]
+
+    def register(self, widget, **roles):
+        """Make widget's options (e.g. fg_color="card") follow the palette; returns widget"""
+        built = self.palettes[self.default]
+        self.entries.append((widget, roles, {option: built[role] for option, role in roles.items()}))
+        return widget
+
+    def listen(self, callback):
+        """Call callback(registry) after every switch"""
+        self.listeners.append(callback)
+
+    def apply(self, theme=None):
+        """Switch to theme (default: bring new widgets up to the current one)
+
+        Returns the number of configure() calls made.
+        """
+        theme = theme or self.theme
+        palette = self.palettes[theme]
+        calls = 0
+        for widget, roles, applied in self.entries:
+            changes = {}
+            for option, role in roles.items():
+                if applied[option] != palette[role]:
+                    changes[option] = palette[role]
+            if changes:
+                widget.configure(**changes)
+                applied.update(changes)
+                calls += 1
+        self.configure_calls += calls
+        changed = theme != self.theme
+        self.theme = theme
+        if changed:
+            for callback in self.listeners:
+                callback(self)
+        return calls
@@ -0,0 +1,146 @@
+"""Toast notifications for the GUI, drawn from a small pool of reusable widgets.
+
+Toasts stack up from the bottom right corner, at most TOAST_SLOTS at a
+time. A message that is already on screen (or waiting) is coalesced into
+it with a repeat count instead of stacking a copy, new toasts appear at
+most once every TOAST_MIN_INTERVAL_MS, and when every slot is busy the
+oldest toast makes room once it has been readable for a moment. Messages
+beyond TOAST_QUEUE_LIMIT drop the oldest waiting one; the status bar has
+already shown it.
+"""
+import time
+from collections import deque
+
+import customtkinter as ctk
+
+TOAST_SLOTS = 3
+TOAST_DURATION_MS = 3000
+TOAST_MIN_VISIBLE_MS = 1000
+TOAST_MIN_INTERVAL_MS = 150
+TOAST_QUEUE_LIMIT = 20
+TOAST_GAP = 10
+
+
+class Toast:
+    """One toast widget, hidden and reused rather than destroyed"""
+
+    def __init__(self, parent, icon_font, body_font):
+        self.frame = ctk.CTkFrame(parent, corner_radius=10, border_width=1)
+        self.icon_label = ctk.CTkLabel(self.frame, text="", font=icon_font)
+        self.icon_label.grid(row=0, column=0, padx=(15, 5), pady=15)
+        self.message_label = ctk.CTkLabel(self.frame, text="", font=body_font, justify="left")
+        self.message_label.grid(row=0, column=1, padx=(0, 15), pady=15, sticky="w")
+        self.key = None
+        self.count = 0
+        self.shown_at = 0.0
+        self.after_id = None
+
+
+class ToastManager:
+    """Queues, coalesces, rate-limits and stacks toasts for one window"""
+
+    def __init__(self, app):
+        self.app = app
+        self.root = app.root
+        self.pool = []
+        # Shown toasts, oldest first
+        self.visible = []
+        # Waiting messages as [key, count, color]
+        self.queue = deque()
+        self.last_shown = 0.0
+        self.drain_after_id = None
+        self.icon_font = None
+
+    def notify(self, message, icon, color):
+        key = (icon, message)
+        for toast in self.visible:
+            if toast.key == key:
+                toast.count += 1
+                self._set_text(toast)
+                self._start_timer(toast)
+                return
+        for waiting in self.queue:
+            if waiting[0] == key:
+                waiting[1] += 1
+                return
+        if len(self.queue) >= TOAST_QUEUE_LIMIT:
+            self.queue.popleft()
+        self.queue.append([key, 1, color])
+        self.drain()
+
+    def drain(self):
+        """Show waiting messages as slots and the rate limit allow"""
+        if self.drain_after_id is not None:
+            self.root.after_cancel(self.drain_after_id)
+            self.drain_after_id = None
+        while self.queue:
+            now = time.monotonic()
+            wait = TOAST_MIN_INTERVAL_MS / 1000 - (now - self.last_shown)
+            if len(self.visible) >= TOAST_SLOTS:
+                oldest = self.visible[0]
+                wait = max(wait, oldest.shown_at + TOAST_MIN_VISIBLE_MS / 1000 - now)
+            if wait > 0:
+                self.drain_after_id = self.root.after(int(wait * 1000) + 1, self.drain)
+                return
+            if len(self.visible) >= TOAST_SLOTS:
+                self._hide(self.visible[0])
+            key, count, color = self.queue.popleft()
+            self._show(key, count, color)
+
+    def _take(self):
+        if self.pool:
+            return self.pool.pop()
+        if self.icon_font is None:
+            self.icon_font = ctk.CTkFont(size=20)
+        return Toast(self.app.main_frame, self.icon_font, self.app.fonts["body"])
+
+    def _set_text(self, toast):
+        icon, message = toast.key
+        toast.icon_label.configure(text=icon)
+        toast.message_label.configure(text=message if toast.count == 1 else f"{message}  ×{toast.count}")
+
+    def _start_timer(self, toast):
+        if toast.after_id is not None:
+            self.root.after_cancel(toast.after_id)
+        toast.after_id = self.root.after(TOAST_DURATION_MS, lambda: self.hide(toast))
+
+    def _show(self, key, count, color):
+        toast = self._take()
+        toast.key = key
+        toast.count = count
+        toast.shown_at = self.last_shown = time.monotonic()
+        width = min(400, self.root.winfo_width() - 60)
+        toast.frame.configure(width=width, border_color=color, fg_color=self.app.theme.color("bg"))
+        toast.message_label.configure(text_color=self.app.theme.color("text"), wraplength=width - 80)
+        self._set_text(toast)
+        # Lay it out now so its height is known for stacking
+        toast.frame.update_idletasks()
+        self.visible.append(toast)
+        self._start_timer(toast)
+        self._restack()
+
+    def hide(self, toast):
+        self._hide(toast)
+        self.drain()
+
+    def _hide(self, toast):
+        if toast not in self.visible:
+            return
+        if toast.after_id is not None:
+            self.root.after_cancel(toast.after_id)
+            toast.after_id = None
+        toast.frame.place_forget()
+        self.visible.remove(toast)
+        self.pool.append(toast)
+        self._restack()
+
+    def _restack(self):
+        # Newest at the bottom right, older ones pushed up above it
+        window_width = self.root.winfo_width()
+        x = window_width - min(400, window_width - 60) - 30
+        y = self.root.winfo_height() - 100
+        for index, toast in enumerate(reversed(self.visible)):
+            if index:
+                y -= toast.frame.winfo_reqheight() + TOAST_GAP
+            toast.frame.place(x=x, y=y)
+            toast.frame.lift()
@@ -0,0 +1,287 @@
+"""Decode-back verification of generated codes.
+
+Reads a code the way a scanner would, from pixels, and checks that it
+decodes to the payload it was made from:
+
+    problem = verify_export("code.png", options)   # None if it scans
+
+PNG exports are checked from the file itself. Other formats, and codes
+still in memory, are drawn one pixel per module in their colours and read
+back from that. Pixels go through a fixed grey threshold like a simple
+scanner's binarizer, so a fill colour too light to read as dark (yellow on
+white, say) fails here as it would in print, and the problem says so with
+its contrast ratio.
+
+The decoder is pure NumPy and deliberately independent of the encoder:
+format information, zigzag placement, block interleaving, Reed-Solomon
+syndromes and the segment bit stream are all read here from the QR
+specification. Errors are detected but not corrected, since a freshly
+generated code must not contain any.
+"""
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageColor
+from qrcode import base, util
+
+from qrcapacity import ERROR_CORRECTION_MAP, plan
+from qrengine import encode_matrix, rasterize, resolve_color
+from qrexport import export_format
+from qrmask import data_region, mask_grids
+
+# Grey level (0-255) below which a pixel reads as dark
+SCAN_THRESHOLD = 128
+
+# WCAG contrast ratio below which a code is flagged even if it decodes
+MIN_CONTRAST_RATIO = 3.0
+
+_LEVEL_NAMES = {correction: level for level, correction in ERROR_CORRECTION_MAP.items()}
+
+# Reed-Solomon arithmetic in GF(256) with the QR polynomial x^8+x^4+x^3+x^2+1
+_EXP = np.zeros(512, dtype=np.int32)
+_LOG = np.zeros(256, dtype=np.int32)
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+_EXP[255:510] = _EXP[:255]
+
+
+class DecodeError(ValueError):
+    """Raised when a module matrix doesn't decode"""
+
+
+@lru_cache(maxsize=None)
+def _format_codes():
+    # All 32 valid 15 bit format words and the (error correction, mask) they stand for
+    return {
+        util.BCH_type_info((correction << 3) | mask): (correction, mask)
+        for correction in ERROR_CORRECTION_MAP.values() for mask in range(8)
+    }
+
+
+def _read_format(matrix):
+    size = matrix.shape[0]
+    # Both copies, bit i at the same positions qrcode writes them to
+    vertical = [(i, 8) if i < 6 else (i + 1, 8) if i < 8 else (size - 15 + i, 8) for i in range(15)]
+    horizontal = [(8, size - i - 1) if i < 8 else (8, 15 - i) if i < 9 else (8, 14 - i) for i in range(15)]
+    best = None
+    for positions in (vertical, horizontal):
+        word = sum(int(matrix[row, column]) << i for i, (row, column) in enumerate(positions))
+        for code, meaning in _format_codes().items():
+            distance = bin(word ^ code).count("1")
+            if best is None or distance < best[0]:
+                best = (distance, meaning)
+    # Format words are at least 7 bits apart, so up to 3 flipped bits are unambiguous
+    if best[0] > 3:
+        raise DecodeError("unreadable format information")
+    return best[1]
+
+
+@lru_cache(maxsize=None)
+def _read_order(version):
+    """Flat indices of the data modules in placement order"""
+    size = version * 4 + 17
+    region = data_region(version)
+    order = []
+    upward = True
+    for right in range(size - 1, 0, -2):
+        # The vertical timing pattern shifts every pair left of it by one
+        if right <= 6:
+            right -= 1
+        rows = range(size - 1, -1, -1) if upward else range(size)
+        for row in rows:
+            for column in (right, right - 1):
+                if region[row, column]:
+                    order.append(row * size + column)
+        upward = not upward
+    return np.array(order)
+
+
+@lru_cache(maxsize=None)
+def _block_layout(version, correction):
+    """Stream positions of each block's codewords, grouped by block length
+
+    Codewords are interleaved: the first data codeword of every block, then
+    the second and so on, followed by the error correction codewords the
+    same way. Returns ((data count, positions array (blocks, length)), ...)
+    with one entry per block length, blocks in order within each.
+    """
+    blocks = base.rs_blocks(version, correction)
+    positions = [[] for _ in blocks]
+    position = 0
+    for part in ("data", "ec"):
+        counts = [block.data_count if part == "data" else block.total_count - block.data_count
+                  for block in blocks]
+        for index in range(max(counts)):
+            for number, count in enumerate(counts):
+                if index < count:
+                    positions[number].append(position)
+                    position += 1
+    groups = {}
+    for block, block_positions in zip(blocks, positions):
+        groups.setdefault((block.total_count, block.data_count), []).append(block_positions)
+    return tuple((data_count, np.array(group)) for (_, data_count), group in groups.items())
+
+
+def _syndromes_clear(blocks, ec_count):
+    # A valid block evaluates to zero at the generator's roots a^0 .. a^(ec-1).
+    # blocks is (count, length); zero codewords contribute nothing.
+    length = blocks.shape[1]
+    powers = length - 1 - np.arange(length)
+    logs = (_LOG[blocks][np.newaxis] + np.arange(ec_count)[:, np.newaxis, np.newaxis] * powers) % 255
+    terms = np.where(blocks != 0, _EXP[logs], 0)
+    return not np.bitwise_xor.reduce(terms, axis=2).any()
+
+
+def _data_bits(matrix, version, correction, mask):
+    """The data codewords of every block in order as a bit array, after checking each block"""
+    unmasked = matrix ^ (mask_grids(matrix.shape[0])[mask] & data_region(version))
+    bits = unmasked.ravel()[_read_order(version)]
+    stream = np.packbits(bits[:len(bits) // 8 * 8]).astype(np.int32)
+
+    data = []
+    for data_count, positions in _block_layout(version, correction):
+        blocks = stream[positions]
+        if not _syndromes_clear(blocks, blocks.shape[1] - data_count):
+            raise DecodeError("error correction codewords don't check out")
+        data.append(blocks[:, :data_count].astype(np.uint8).ravel())
+    # Blocks of equal length are consecutive, so the groups are already in block order
+    return np.unpackbits(np.concatenate(data))
+
+
+def _values(bits, width):
+    # Consecutive width bit big-endian integers
+    return bits.reshape(-1, width).astype(np.int64) @ (1 << np.arange(width - 1, -1, -1))
+
+
+def _parse(bits, version):
+    position = 0
+    payload = bytearray()
+
+    def take(count):
+        nonlocal position
+        if position + count > len(bits):
+            raise DecodeError("segment runs past the end of the data")
+        taken = bits[position:position + count]
+        position += count
+        return taken
+
+    while len(bits) - position >= 4:
+        mode = int(_values(take(4), 4)[0])
+        if mode == 0:
+            break
+        if mode not in (util.MODE_NUMBER, util.MODE_ALPHA_NUM, util.MODE_8BIT_BYTE):
+            raise DecodeError(f"unsupported segment mode {mode:04b}")
+        width = util.length_in_bits(mode, version)
+        count = int(_values(take(width), width)[0])
+        if mode == util.MODE_NUMBER:
+            groups, rest = divmod(count, 3)
+            payload += "".join(f"{value:03d}" for value in _values(take(groups * 10), 10).tolist()).encode("ascii")
+            if rest:
+                width = util.NUMBER_LENGTH[rest]
+                payload += str(int(_values(take(width), width)[0])).zfill(rest).encode("ascii")
+        elif mode == util.MODE_ALPHA_NUM:
+            pairs, rest = divmod(count, 2)
+            for value in _values(take(pairs * 11), 11).tolist():
+                payload += bytes((util.ALPHA_NUM[value // 45], util.ALPHA_NUM[value % 45]))
+            if rest:
+                payload += bytes((util.ALPHA_NUM[int(_values(take(6), 6)[0])],))
+        else:
+            payload += np.packbits(take(count * 8)).tobytes()
+    return bytes(payload)
+
+
+def decode_matrix(matrix):
+    """Decode a module matrix (True = dark, no border) to its payload bytes
+
+    Returns (payload, error level name, mask). Raises DecodeError.
+    """
+    matrix = np.asarray(matrix, dtype=bool)
+    size = matrix.shape[0]
+    if matrix.shape != (size, size) or size < 21 or (size - 17) % 4:
+        raise DecodeError(f"{matrix.shape} isn't a QR code size")
+    version = (size - 17) // 4
+    correction, mask = _read_format(matrix)
+    payload = _parse(_data_bits(matrix, version, correction, mask), version)
+    return payload, _LEVEL_NAMES[correction], mask
+
+
+def sample(image, modules, border):
+    """Module matrix read from the centre pixel of every module of an image
+
+    Returns (matrix, quiet zone is light).
+    """
+    grey = np.asarray(image.convert("L"))
+    total = modules + 2 * border
+    side = grey.shape[0]
+    if grey.shape != (side, side) or side % total:
+        raise DecodeError(f"a {grey.shape[1]}x{grey.shape[0]} image doesn't fit {total} modules")
+    box_size = side // total
+    centres = np.arange(total) * box_size + box_size // 2
+    dark = grey[np.ix_(centres, centres)] < SCAN_THRESHOLD
+    inner = dark[border:border + modules, border:border + modules]
+    return inner, not dark.sum() - inner.sum()
+
+
+def _luminance(color):
+    channels = np.array(ImageColor.getrgb(resolve_color(color))[:3]) / 255
+    linear = np.where(channels <= 0.03928, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+    return float(linear @ [0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(fill_color, back_color):
+    """WCAG contrast ratio between two colours, from 1 (none) to 21"""
+    lighter, darker = sorted((_luminance(fill_color), _luminance(back_color)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def _check(image, options, modules=None):
+    if modules is None:
+        # Only a file to go on: the side comes from the version the payload needs
+        version = plan(options.data, options.error_level, options.segmentation)[0]
+        if version is None:
+            return "doesn't fit in a QR code"
+        modules = version * 4 + 17
+    try:
+        matrix, quiet = sample(image, modules, options.border)
+        if not quiet:
+            raise DecodeError("quiet zone doesn't read as light")
+        payload, level, _ = decode_matrix(matrix)
+        if payload != util.to_bytestring(options.data):
+            raise DecodeError("decodes to a different payload")
+        if level != options.error_level:
+            raise DecodeError(f"decodes at error level {level} instead of {options.error_level}")
+        problem = None
+    except DecodeError as e:
+        problem = f"doesn't scan: {e}"
+    ratio = contrast_ratio(options.fill_color, options.back_color)
+    if ratio < MIN_CONTRAST_RATIO:
+        warning = (f"low contrast {ratio:.1f}:1 between {options.fill_color} and {options.back_color} "
+                   f"(aim for {MIN_CONTRAST_RATIO:g}:1 or more)")
+        problem = f"{problem}; {warning}" if problem else f"scans, but {warning}"
+    return problem
+
+
+def verify_matrix(matrix, options):
+    """Check that matrix, drawn in options' colours, scans back to options.data
+
+    Returns None, or a description of the problem.
+    """
+    image = rasterize(matrix, 1, options.border, options.fill_color, options.back_color)
+    return _check(image, options, matrix.shape[0])
+
+
+def verify_export(path, options, matrix=None):
+    """Check an exported file: a PNG from its pixels, other formats from the matrix
+
+    matrix, if given, must be encode_matrix(options). Returns None, or a
+    description of the problem.
+    """
+    if export_format(path) == "png":
+        with Image.open(path) as image:
+            return _check(image, options)
+    return verify_matrix(encode_matrix(options) if matrix is None else matrix, options)